@@ -2,15 +2,16 @@ import json
 import logging
 import os
 import sys
-from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import requests
 from fastapi import APIRouter, HTTPException, Response, status
 from gotrue.errors import AuthApiError
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings, supabase
+from app.core.db import db_timestamp, execute
 from app.schemas.auth import RefreshTokenRequest, Token, UserLogin, UserSignUp
 from app.schemas.users import UserOut
 
@@ -36,7 +37,7 @@ async def signup(user: UserSignUp):
     
     try:
         logger.info(f"Creating auth user for email: {user.email}")
-        auth_response = supabase.auth.sign_up({
+        auth_response = await run_in_threadpool(supabase.auth.sign_up, {
             "email": user.email,
             "password": user.password
         })
@@ -48,7 +49,7 @@ async def signup(user: UserSignUp):
         user_id = auth_response.user.id
         logger.info(f"User created with ID: {user_id}")
         
-        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+        now = db_timestamp()
         
         profile = {
             "id": user_id,
@@ -61,7 +62,7 @@ async def signup(user: UserSignUp):
         }
         
         logger.info(f"Inserting user profile into database: {profile}")
-        result = supabase.table("users").insert(profile).execute()
+        result = await execute(supabase.table("users").insert(profile))
         
         return UserOut(
             id=user_id,
@@ -89,13 +90,13 @@ async def login_for_access_token(user_login: UserLogin, response: Response):
         password = user_login.password
         
         # Check if user email exists
-        user_check_response = supabase.table("users").select("id").eq("email", email).execute()
+        user_check_response = await execute(supabase.table("users").select("id").eq("email", email))
         if not user_check_response.data:
             logger.warning(f"Login failed: Email not found - {email}")
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="An account with this email does not exist.")
         
         logger.info(f"Login attempt for email: {email}")
-        auth_resp = supabase.auth.sign_in_with_password({"email": email, "password": password})
+        auth_resp = await run_in_threadpool(supabase.auth.sign_in_with_password, {"email": email, "password": password})
         
         if not getattr(auth_resp, "session", None):
             raise HTTPException(status_code=401, detail="Incorrect email or password")
@@ -151,7 +152,7 @@ async def refresh_access_token(request: RefreshTokenRequest):
     
     try:
         # Use Supabase SDK to refresh the token
-        auth_response = supabase.auth.refresh_session(request.refresh_token)
+        auth_response = await run_in_threadpool(supabase.auth.refresh_session, request.refresh_token)
         
         if not auth_response.session:
             raise HTTPException(
@@ -3,16 +3,25 @@ Challenges API endpoints for managing challenge resources.
 Provides CRUD operations for challenges with authorization controls.
 """
 from datetime import datetime, timedelta, time, date
+from functools import lru_cache
 from typing import List, Optional
+import hashlib
 import pytz
 import uuid
+from postgrest.exceptions import APIError
 from supabase import Client
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status, BackgroundTasks
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status, BackgroundTasks
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
 
+from app.core.cache import SingleFlight, TTLCache
 from app.core.config import settings, supabase
+from app.core.db import db_timestamp, execute, execute_all
 from app.core.deps import get_current_user, get_supabase
 from app.core.media import delete_file, upload_base64_image, upload_file
+from app.core.pagination import NEXT_CURSOR_HEADER, apply_cursor, next_cursor
 from app.core.moderation import moderate_challenge
 from app.schemas.base64 import Base64Images
 from app.schemas.challenges import (ChallengeBase, ChallengeCreate,
@@ -23,9 +32,34 @@ from app.services.scheduler import create_scheduler_job, delete_scheduler_job, g
 from app.services.notifications import send_fcm_notification
 from app.schemas.users import UserOut
 
-router = APIRouter(tags=["challenges"])
+router = APIRouter(tags=["challenges"], default_response_class=ORJSONResponse)
 embedding_model = settings.EMBEDDING_MODEL
 
+# Short-lived cache of challenge rows keyed by challenge id, plus the full
+# listing under ALL_CHALLENGES_KEY. Anything that writes a challenge row, or
+# moves its trigger-maintained counters, must call invalidate_challenge.
+challenge_cache = TTLCache(maxsize=10_000, ttl=30)
+ALL_CHALLENGES_KEY = "__all__"
+# Concurrent misses on the same key share one database read
+challenge_loads = SingleFlight()
+
+# Metrics a challenge leaderboard can be ranked by
+RANKING_METRICS = frozenset(("points", "check_ins", "streak"))
+
+
+# Trending pages keyed by limit. The backing materialized view is refreshed
+# every few minutes, so a minute of caching never hides fresher scores.
+TRENDING_TTL = 60
+trending_cache = TTLCache(maxsize=64, ttl=TRENDING_TTL)
+
+# Validates and serializes a whole page of challenge rows in a single call
+challenge_list_adapter = TypeAdapter(list[ChallengeOut])
+
+
+def invalidate_challenge(*challenge_ids: str):
+    """Drops cached rows for the given challenges along with the full listing."""
+    challenge_cache.pop(*challenge_ids, ALL_CHALLENGES_KEY)
+
 def get_embedding(text: str) -> list[float]:
     return embedding_model.encode(text).tolist()
 
@@ -44,43 +78,137 @@ def _cancel_participant_notifications(user_id: str, challenge_id: str, client, d
         print(f"Error cancelling notifications for user {user_id} in challenge {challenge_id}: {e}")
 
 
-def _schedule_participant_notifications(user, challenge: dict, client, db_client):
-    """Schedules all notifications for a single participant based on their timezone."""
+def _delete_scheduler_jobs(job_records: list[dict], client=None):
+    """Deletes the scheduler jobs listed in a batch of participant_jobs rows."""
+    if not job_records:
+        return
+    client = client or get_scheduler_client()
+    for record in job_records:
+        job_ids = record.get("scheduler_job_ids")
+        if isinstance(job_ids, dict):
+            for job_name in job_ids.values():
+                delete_scheduler_job(client, job_name)
+
+
+def _cancel_challenge_notifications(challenge_id: str, db_client, client=None):
+    """Fetches and deletes the jobs of every participant of a challenge in one pass."""
+    try:
+        job_records_resp = db_client.table("participant_jobs").select("scheduler_job_ids").eq("challenge_id", challenge_id).execute()
+        if not job_records_resp.data:
+            return
+        _delete_scheduler_jobs(job_records_resp.data, client)
+        # Clean up all records at once
+        db_client.table("participant_jobs").delete().eq("challenge_id", challenge_id).execute()
+    except Exception as e:
+        print(f"Error cancelling notifications for challenge {challenge_id}: {e}")
+
+
+async def _raise_missing_or_forbidden(challenge_id: str, db_client, action: str):
+    """Explains why an ownership-scoped write on a challenge matched no rows."""
+    exists = await execute(db_client.table("challenges").select("id", count="exact", head=True).eq("id", challenge_id))
+    if not exists.count:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not authorized to {action} this challenge")
+
+
+@lru_cache(maxsize=256)
+def _utc_checkin_time(checkin_time: str, timezone: str, day: date) -> datetime:
+    """
+    Converts a challenge's local check-in TIME to UTC for one timezone and day.
+    
+    Participants mostly share a handful of timezones, so when a whole
+    challenge is rescheduled the parse and conversion run once per timezone
+    rather than once per participant.
+    """
+    local_checkin_time = datetime.strptime(checkin_time, '%H:%M:%S').time()
+    local_dt = pytz.timezone(timezone).localize(datetime.combine(day, local_checkin_time))
+    return local_dt.astimezone(pytz.utc)
+
+
+def _create_participant_jobs(user, challenge: dict, client) -> dict | None:
+    """
+    Creates the scheduler jobs for a single participant based on their timezone.
+    
+    Returns:
+        dict | None: participant_jobs row recording the created jobs, or None
+        if nothing was scheduled
+    """
     job_ids = {}
+    challenge_id = challenge['id']
+    user_id = user.id
     checkin_time = challenge.get("check_in_time")
     user_timezone = user.timezone or 'UTC'
 
     if not checkin_time:
-        return
+        return None
 
     try:
-        # Convert the TIME string from DB into a time object
-        local_checkin_time = datetime.strptime(checkin_time, '%H:%M:%S').time()
-        
-        # Combine with today's date to create a datetime object for timezone conversion
-        user_tz = pytz.timezone(user_timezone)
-        today = date.today()
-        local_dt = user_tz.localize(datetime.combine(today, local_checkin_time))
-        
-        # Convert to UTC for scheduling
-        utc_checkin_time = local_dt.astimezone(pytz.utc)
+        # Convert the local check-in time (on today's date) to UTC for scheduling
+        utc_checkin_time = _utc_checkin_time(checkin_time, user_timezone, date.today())
 
         # Check-in reminder
         cron_schedule = f"{utc_checkin_time.minute} {utc_checkin_time.hour} * * *"
-        job_id = f"challenge-{challenge['id']}-user-{user.id}-checkin-{uuid.uuid4()}"
-        payload = {"challenge_id": challenge['id'], "user_id": user.id, "type": "checkin"}
+        job_id = f"challenge-{challenge_id}-user-{user_id}-checkin-{uuid.uuid4()}"
+        payload = {"challenge_id": challenge_id, "user_id": user_id, "type": "checkin"}
         job_name = create_scheduler_job(client, job_id, cron_schedule, "UTC", payload)
         if job_name:
             job_ids["checkin"] = job_name
-        if job_ids:
-            db_client.table("participant_jobs").upsert({
-                "challenge_id": challenge['id'],
-                "user_id": user.id,
-                "scheduler_job_ids": job_ids
-            }).execute()
+    except Exception as e:
+        print(f"Error scheduling notifications for user {user_id}: {e}")
+
+    if not job_ids:
+        return None
+    return {
+        "challenge_id": challenge_id,
+        "user_id": user_id,
+        "scheduler_job_ids": job_ids
+    }
+
+
+def _schedule_participant_notifications(user, challenge: dict, client, db_client):
+    """Schedules all notifications for a single participant based on their timezone."""
+    job_row = _create_participant_jobs(user, challenge, client)
+    if not job_row:
+        return
 
+    try:
+        db_client.table("participant_jobs").upsert(job_row).execute()
     except Exception as e:
-        print(f"Error scheduling notifications for user {user.id}: {e}")
+        print(f"Error saving notification jobs for user {user.id}: {e}")
+
+
+def _challenge_etag(challenge: dict) -> str:
+    """Builds a strong ETag from the fields that change whenever a challenge does."""
+    version = f"{challenge.get('updated_at')}|{challenge.get('participant_count')}|{challenge.get('posts_count')}"
+    return f'"{hashlib.md5(version.encode()).hexdigest()}"'
+
+
+async def get_challenge_or_404(challenge_id: str) -> dict:
+    """
+    Dependency that loads a challenge row, going through the challenge cache.
+    
+    Args:
+        challenge_id (str): UUID of the challenge
+        
+    Returns:
+        dict: Challenge row
+        
+    Raises:
+        HTTPException: 404 if challenge not found
+    """
+    challenge = challenge_cache.get(challenge_id)
+    if challenge is not None:
+        return challenge
+
+    async def load() -> dict:
+        try:
+            resp = await execute(supabase.table("challenges").select("*").eq("id", challenge_id).single())
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
+        challenge_cache.set(challenge_id, resp.data)
+        return resp.data
+
+    return await challenge_loads.do(challenge_id, load)
 
 
 @router.post("/", response_model=ChallengeOut, status_code=status.HTTP_201_CREATED)
@@ -103,32 +231,27 @@ async def create_challenge(payload: ChallengeCreate, user=Depends(get_current_us
         #if payload.description:
         #    await moderate_challenge(payload.description, raise_exception=True)
         
-        record = payload.model_dump(exclude={"user_timezone"})
-        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
-        record.update({"creator_id": user.id, "created_at": now, "updated_at": now})
-        
-        if record.get("check_in_time"):
-            record["check_in_time"] = record["check_in_time"].strftime("%H:%M:%S")
-        if record.get("checkin_time"):
-             record["checkin_time"] = record["checkin_time"].isoformat()
-        if record.get("due_date"):
-            record["due_date"] = record["due_date"].isoformat()
+        # JSON mode serializes datetimes and times straight to the strings the DB expects
+        record = payload.model_dump(mode="json", exclude={"user_timezone"}, exclude_none=True)
+        now = db_timestamp()
+        record |= {"creator_id": user.id, "created_at": now, "updated_at": now}
         
         if record.get("embedding") is None:
             title = record.get("title", "")
             description = record.get("description", "")
             location = record.get("location", "")
             string_to_vectorize = f"{title}\n{description}\n{location}"
-            content_embedding = get_embedding(string_to_vectorize)
+            content_embedding = await run_in_threadpool(get_embedding, string_to_vectorize)
             record["embedding"] = content_embedding
         
         
-        resp = supabase.table("challenges").insert(record).execute()
+        resp = await execute(supabase.table("challenges").insert(record))
 
         if not resp.data:
             raise HTTPException(status_code=400, detail="Failed to create challenge")
         
         new_challenge = resp.data[0]
+        invalidate_challenge()
         
         return new_challenge
     except HTTPException:
@@ -136,27 +259,128 @@ async def create_challenge(payload: ChallengeCreate, user=Depends(get_current_us
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating challenge: {str(e)}")
 
-@router.get("/", response_model=list[ChallengeOut])
+@router.get("/", response_model=None, responses={200: {"model": list[ChallengeOut]}})
 async def list_challenges():
     """
     List all challenges.
     
+    Rows are validated and serialized once when the cache is filled; cache
+    hits are written out directly with orjson.
+    
     Returns:
         list[ChallengeOut]: List of challenge objects
     """
+    async def load() -> list[dict]:
+        try:
+            resp = await execute(supabase.table("challenges").select("*"))
+            rows = challenge_list_adapter.dump_python(
+                challenge_list_adapter.validate_python(resp.data), mode="json"
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching challenges: {str(e)}")
+        challenge_cache.set(ALL_CHALLENGES_KEY, rows)
+        return rows
+
+    cached = challenge_cache.get(ALL_CHALLENGES_KEY)
+    if cached is None:
+        cached = await challenge_loads.do(ALL_CHALLENGES_KEY, load)
+    return ORJSONResponse(cached)
+
+@router.get("/visible", response_model=list[ChallengeOut])
+async def list_visible_challenges(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user)
+):
+    """
+    List challenges the current user may see, newest first.
+    
+    Public challenges, challenges the user created and private challenges
+    they have joined are filtered in Postgres, so every page is full.
+    
+    Args:
+        limit (int): Maximum number of challenges to return (max 100)
+        offset (int): Number of challenges to skip; ignored when `cursor` is given
+        cursor (str, optional): X-Next-Cursor header of the previous page, for
+            keyset pagination that stays fast however deep the client pages
+        user: Current authenticated user from token
+        
+    Returns:
+        list[ChallengeOut]: Page of visible challenges
+    """
     try:
-        resp = supabase.table("challenges").select("*").execute()
+        query = supabase.rpc("visible_challenges", {"p_user_id": user.id})
+        if cursor:
+            query = apply_cursor(query, cursor, limit)
+        else:
+            query = query.order("created_at", desc=True).order("id", desc=True).range(offset, offset + limit - 1)
+        resp = await execute(query)
+
+        cursor_token = next_cursor(resp.data, limit)
+        if cursor_token:
+            response.headers[NEXT_CURSOR_HEADER] = cursor_token
         return resp.data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching challenges: {str(e)}")
 
+@router.get("/trending", response_model=None, responses={200: {"model": list[ChallengeOut]}})
+async def get_trending_challenges(limit: int = Query(10, ge=1, le=50)):
+    """
+    List the currently trending public challenges.
+
+    Scores come from the challenge_trending materialized view, which is
+    refreshed on a schedule, so this is a single indexed read. Serialized
+    pages are cached briefly and written out directly with orjson. The page
+    holds no per-user data, so it is marked public and shared caches in front
+    of the API can serve it for the same period.
+
+    Args:
+        limit (int): Maximum number of challenges to return
+
+    Returns:
+        list[ChallengeOut]: Challenges ordered by trend score
+    """
+    async def load() -> list[dict]:
+        try:
+            resp = await execute(
+                supabase.table("challenge_trending")
+                .select("trend_score, challenges(*)")
+                .order("trend_score", desc=True)
+                .order("challenge_id")
+                .limit(limit)
+            )
+            challenges = [row["challenges"] for row in resp.data if row.get("challenges")]
+            rows = challenge_list_adapter.dump_python(
+                challenge_list_adapter.validate_python(challenges), mode="json"
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching trending challenges: {str(e)}")
+        trending_cache.set(limit, rows)
+        return rows
+
+    cached = trending_cache.get(limit)
+    if cached is None:
+        cached = await challenge_loads.do(("trending", limit), load)
+    return ORJSONResponse(cached, headers={"Cache-Control": f"public, max-age={TRENDING_TTL}"})
+
 @router.get("/{challenge_id}", response_model=ChallengeOut)
-async def get_challenge(challenge_id: str):
+async def get_challenge(
+    request: Request,
+    response: Response,
+    challenge: dict = Depends(get_challenge_or_404)
+):
     """
     Get a specific challenge by ID.
     
+    Responses carry an ETag; a request whose If-None-Match matches it gets an
+    empty 304 Not Modified instead of the body.
+    
     Args:
-        challenge_id (str): UUID of the challenge to retrieve
+        challenge (dict): Challenge row resolved from the challenge_id path parameter
         
     Returns:
         ChallengeOut: Challenge data
@@ -164,11 +388,14 @@ async def get_challenge(challenge_id: str):
     Raises:
         HTTPException: 404 if challenge not found
     """
-    try:
-        resp = supabase.table("challenges").select("*").eq("id", challenge_id).single().execute()
-        return resp.data
-    except Exception as e:
-        raise HTTPException(status_code=404, detail="Challenge not found")
+    etag = _challenge_etag(challenge)
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=30"
+    return challenge
 
 @router.put("/{challenge_id}", response_model=ChallengeOut)
 async def update_challenge(
@@ -178,7 +405,13 @@ async def update_challenge(
     user=Depends(get_current_user),
     supabase_client: Client = Depends(get_supabase)
 ):
-    existing_challenge_resp = supabase_client.table("challenges").select("*").eq("id", challenge_id).single().execute()
+    # Only the fields checked or re-embedded below; the stored embedding is large
+    existing_challenge_resp = await execute(
+        supabase_client.table("challenges")
+        .select("creator_id, background_photo, title, description, location")
+        .eq("id", challenge_id)
+        .single()
+    )
     if not existing_challenge_resp.data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
 
@@ -186,29 +419,37 @@ async def update_challenge(
     if existing_challenge["creator_id"] != user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this challenge")
 
-    update_data = payload.model_dump(exclude_unset=True)
-    update_data["updated_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+    update_data = payload.model_dump(mode="json", exclude_unset=True)
+    update_data["updated_at"] = db_timestamp()
 
-    if "check_in_time" in update_data and update_data["check_in_time"]:
-        update_data["check_in_time"] = update_data["check_in_time"].strftime("%H:%M:%S")
-        
-        def reschedule_all_participants():
+    if update_data.get("check_in_time"):
+        async def reschedule_all_participants():
             print(f"Background task: Rescheduling all participants for challenge {challenge_id}")
-            participants_resp = supabase_client.table("challenge_participants").select("user_id").eq("challenge_id", challenge_id).execute()
-            if not participants_resp.data:
-                return
-
-            challenge_resp = supabase_client.table("challenges").select("*").eq("id", challenge_id).single().execute()
-            if not challenge_resp.data:
+            participants_resp, challenge_resp = await execute_all(
+                supabase_client.table("challenge_participants").select("user_id").eq("challenge_id", challenge_id),
+                supabase_client.table("challenges").select("id, check_in_time").eq("id", challenge_id).limit(1),
+            )
+            if not participants_resp.data or not challenge_resp.data:
                 return
             
-            scheduler_client = get_scheduler_client()
-            for participant in participants_resp.data:
-                user_resp = supabase_client.table("users").select("id, timezone").eq("id", participant['user_id']).single().execute()
-                if user_resp.data:
-                    user_obj = UserOut(**user_resp.data)
-                    _cancel_participant_notifications(user_obj.id, challenge_id, scheduler_client, supabase_client)
-                    _schedule_participant_notifications(user_obj, challenge_resp.data, scheduler_client, supabase_client)
+            user_ids = [participant['user_id'] for participant in participants_resp.data]
+            users_resp = await execute(supabase_client.table("users").select("id, timezone").in_("id", user_ids))
+
+            def reschedule():
+                scheduler_client = get_scheduler_client()
+                _cancel_challenge_notifications(challenge_id, supabase_client, scheduler_client)
+                job_rows = []
+                for user_row in users_resp.data or []:
+                    user_obj = UserOut.from_row(user_row)
+                    job_row = _create_participant_jobs(user_obj, challenge_resp.data[0], scheduler_client)
+                    if job_row:
+                        job_rows.append(job_row)
+                # One multi-row upsert for every participant's jobs instead of
+                # a round trip per participant
+                if job_rows:
+                    supabase_client.table("participant_jobs").upsert(job_rows).execute()
+
+            await run_in_threadpool(reschedule)
             print(f"Background task: Finished rescheduling for challenge {challenge_id}")
 
         background_tasks.add_task(reschedule_all_participants)
@@ -224,22 +465,23 @@ async def update_challenge(
                 except Exception as e_del:
                     print(f"Failed to delete old background photo {current_background_photo}: {e_del}")
     
-    if update_data.get("checkin_time"):
-        update_data["checkin_time"] = update_data["checkin_time"].isoformat()
-    
     # Re-calculate embedding
     challenge_for_embedding = {**existing_challenge, **update_data}
     title = challenge_for_embedding.get("title", "")
     description = challenge_for_embedding.get("description", "")
     location = challenge_for_embedding.get("location", "")
     embedding_str = f"{title}\n{description}\n{location}"
-    embedding_vector = get_embedding(embedding_str)
+    embedding_vector = await run_in_threadpool(get_embedding, embedding_str)
     update_data["embedding"] = embedding_vector
 
-    supabase_client.table("challenges").update(update_data).eq("id", challenge_id).execute()
-    
-    updated_challenge_resp = supabase_client.table("challenges").select("*").eq("id", challenge_id).single().execute()
-    return updated_challenge_resp.data
+    # Scoping the write to the creator closes the gap between the check above and the update
+    updated_challenge_resp = await execute(
+        supabase_client.table("challenges").update(update_data).eq("id", challenge_id).eq("creator_id", user.id)
+    )
+    invalidate_challenge(challenge_id)
+    if not updated_challenge_resp.data:
+        await _raise_missing_or_forbidden(challenge_id, supabase_client, "update")
+    return updated_challenge_resp.data[0]
 
 @router.delete("/{challenge_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_challenge(challenge_id: str, user=Depends(get_current_user), supabase_client: Client = Depends(get_supabase)):
@@ -258,20 +500,24 @@ async def delete_challenge(challenge_id: str, user=Depends(get_current_user), su
         HTTPException: 404 if challenge not found
     """
     try:
-        challenge_to_delete_resp = supabase_client.table("challenges").select("creator_id, background_photo").eq("id", challenge_id).single().execute()
-        
-        if not challenge_to_delete_resp.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
-            
-        challenge_to_delete = challenge_to_delete_resp.data
-        if challenge_to_delete["creator_id"] != user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this challenge")
-        
-        all_participant_jobs_resp = supabase_client.table("participant_jobs").select("user_id").eq("challenge_id", challenge_id).execute()
-        if all_participant_jobs_resp.data:
-            client = get_scheduler_client()
-            for record in all_participant_jobs_resp.data:
-                _cancel_participant_notifications(record['user_id'], challenge_id, client, supabase_client)
+        # participant_jobs rows cascade with the challenge, so read the job ids first
+        job_records_resp = await execute(
+            supabase_client.table("participant_jobs").select("scheduler_job_ids").eq("challenge_id", challenge_id)
+        )
+        deleted_resp = await execute(
+            supabase_client.table("challenges").delete().eq("id", challenge_id).eq("creator_id", user.id)
+        )
+        invalidate_challenge(challenge_id)
+        if not deleted_resp.data:
+            await _raise_missing_or_forbidden(challenge_id, supabase_client, "delete")
+
+        challenge_to_delete = deleted_resp.data[0]
+        # Don't keep serving the deleted challenge from a cached trending page
+        trending_cache.clear()
+        try:
+            await run_in_threadpool(_delete_scheduler_jobs, job_records_resp.data)
+        except Exception as e_jobs:
+            print(f"Error cancelling notifications for challenge {challenge_id}: {e_jobs}")
 
         background_photo_to_delete = challenge_to_delete.get("background_photo")
         if background_photo_to_delete and isinstance(background_photo_to_delete, list) and len(background_photo_to_delete) == 2:
@@ -280,7 +526,6 @@ async def delete_challenge(challenge_id: str, user=Depends(get_current_user), su
             except Exception as e_del:
                 print(f"Failed to delete background photo {background_photo_to_delete} for challenge {challenge_id}: {e_del}")
         
-        supabase_client.table("challenges").delete().eq("id", challenge_id).execute()
         return None
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -289,41 +534,57 @@ async def delete_challenge(challenge_id: str, user=Depends(get_current_user), su
 
 @router.post("/{challenge_id}/join", response_model=ChallengeParticipantOut, status_code=status.HTTP_201_CREATED)
 async def join_challenge(challenge_id: str, user=Depends(get_current_user), supabase_client: Client = Depends(get_supabase)):
-    challenge_resp = supabase_client.table("challenges").select("*").eq("id", challenge_id).single().execute()
-    if not challenge_resp.data:
-        raise HTTPException(status_code=404, detail="Challenge not found")
-        
-    existing_participant = supabase_client.table("challenge_participants").select("user_id").eq("challenge_id", challenge_id).eq("user_id", user.id).execute()
-    if existing_participant.data:
-        raise HTTPException(status_code=400, detail="Already joined this challenge")
+    user_id = user.id
+    # The join_challenge RPC checks membership and inserts in one transaction;
+    # the challenge row is only needed for scheduling, so fetch it alongside
+    try:
+        challenge_resp, join_resp = await execute_all(
+            supabase_client.table("challenges").select("id, check_in_time").eq("id", challenge_id).limit(1),
+            supabase_client.rpc("join_challenge", {"p_challenge_id": challenge_id, "p_user_id": user_id}),
+        )
+    except APIError as e:
+        if "already_joined" in str(e.message):
+            raise HTTPException(status_code=400, detail="Already joined this challenge")
+        if "challenge_not_found" in str(e.message):
+            raise HTTPException(status_code=404, detail="Challenge not found")
+        raise HTTPException(status_code=400, detail=f"Failed to join challenge: {e.message}")
 
-    participant_data = { "challenge_id": challenge_id, "user_id": user.id }
-    insert_resp = supabase_client.table("challenge_participants").insert(participant_data).execute()
-    if not insert_resp.data:
+    if not challenge_resp.data or not join_resp.data:
         raise HTTPException(status_code=400, detail="Failed to join challenge")
+    # participant_count changed
+    invalidate_challenge(challenge_id)
 
     client = get_scheduler_client()
-    _schedule_participant_notifications(user, challenge_resp.data, client, supabase_client)
+    await run_in_threadpool(_schedule_participant_notifications, user, challenge_resp.data[0], client, supabase_client)
     
-    # Need to fetch the full participant record to return
-    new_participant_resp = supabase_client.table("challenge_participants").select("*").eq("challenge_id", challenge_id).eq("user_id", user.id).single().execute()
-    return new_participant_resp.data
+    return join_resp.data
 
 @router.delete("/{challenge_id}/leave", status_code=status.HTTP_204_NO_CONTENT)
 async def leave_challenge(challenge_id: str, user=Depends(get_current_user), supabase_client: Client = Depends(get_supabase)):
-    client = get_scheduler_client()
-    _cancel_participant_notifications(user.id, challenge_id, client, supabase_client)
+    user_id = user.id
+    # The delete returns the removed rows, so it doubles as the membership check
+    deleted = await execute(supabase_client.table("challenge_participants").delete().eq("challenge_id", challenge_id).eq("user_id", user_id))
+    if not deleted.data:
+        raise HTTPException(status_code=404, detail="Not a participant in this challenge")
+    invalidate_challenge(challenge_id)
 
-    supabase_client.table("challenge_participants").delete().eq("challenge_id", challenge_id).eq("user_id", user.id).execute()
+    client = get_scheduler_client()
+    await run_in_threadpool(_cancel_participant_notifications, user_id, challenge_id, client, supabase_client)
     return None
 
 @router.get("/{challenge_id}/participants", response_model=list[ChallengeParticipantOut])
-async def list_challenge_participants(challenge_id: str):
+async def list_challenge_participants(
+    challenge_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0)
+):
     """
-    List all participants of a challenge.
+    List participants of a challenge, one page at a time.
     
     Args:
         challenge_id (str): UUID of the challenge
+        limit (int): Maximum number of participants to return (max 200)
+        offset (int): Number of participants to skip
         
     Returns:
         list[ChallengeParticipantOut]: List of challenge participants
@@ -332,14 +593,15 @@ async def list_challenge_participants(challenge_id: str):
         HTTPException: 404 if challenge not found
     """
     try:
-        challenge = supabase.table("challenges").select("id").eq("id", challenge_id).single().execute()
-        if not challenge.data:
-            raise HTTPException(status_code=404, detail="Challenge not found")
-        
-        resp = supabase.table("challenge_participants") \
-            .select("*") \
-            .eq("challenge_id", challenge_id) \
-            .execute()
+        resp = await execute(
+            supabase.table("challenge_participants")
+            .select("*")
+            .eq("challenge_id", challenge_id)
+            .range(offset, offset + limit - 1)
+        )
+        if not resp.data:
+            # Only an empty page needs telling apart from a missing challenge
+            await get_challenge_or_404(challenge_id)
             
         return resp.data
     except Exception as e:
@@ -367,25 +629,20 @@ async def update_participation_status(
     Raises:
         HTTPException: 404 if challenge not found or user is not a participant
     """
+    user_id = user.id
     try:
-        existing = supabase.table("challenge_participants") \
-            .select("*") \
-            .eq("challenge_id", challenge_id) \
-            .eq("user_id", user.id) \
-            .execute()
-            
-        if not existing.data:
-            raise HTTPException(status_code=404, detail="Not a participant in this challenge")
-        
+        # The update returns the rows it touched, so it doubles as the
+        # membership check
         update_data = {"status": status}
-        resp = supabase.table("challenge_participants") \
-            .update(update_data) \
-            .eq("challenge_id", challenge_id) \
-            .eq("user_id", user.id) \
-            .execute()
+        resp = await execute(
+            supabase.table("challenge_participants")
+            .update(update_data)
+            .eq("challenge_id", challenge_id)
+            .eq("user_id", user_id)
+        )
             
         if not resp.data:
-            raise HTTPException(status_code=400, detail="Failed to update status")
+            raise HTTPException(status_code=404, detail="Not a participant in this challenge")
             
         return resp.data[0]
     except Exception as e:
@@ -405,20 +662,13 @@ async def get_my_participating_challenges(user=Depends(get_current_user)):
         list[ChallengeOut]: List of challenges the user is participating in
     """
     try:
-        participants = supabase.table("challenge_participants") \
-            .select("challenge_id") \
-            .eq("user_id", user.id) \
-            .execute()
-            
-        if not participants.data:
-            return []
-            
-        challenge_ids = [p["challenge_id"] for p in participants.data]
-        
-        resp = supabase.table("challenges") \
-            .select("*") \
-            .in_("id", challenge_ids) \
-            .execute()
+        # Inner-join the user's participation rows so one request returns
+        # only the challenges they have joined
+        resp = await execute(
+            supabase.table("challenges")
+            .select("*, challenge_participants!inner(user_id)")
+            .eq("challenge_participants.user_id", user.id)
+        )
             
         return resp.data
     except Exception as e:
@@ -436,10 +686,11 @@ async def get_my_created_challenges(user=Depends(get_current_user)):
         list[ChallengeOut]: List of challenges created by the user
     """
     try:
-        resp = supabase.table("challenges") \
-            .select("*") \
-            .eq("creator_id", user.id) \
-            .execute()
+        resp = await execute(
+            supabase.table("challenges")
+            .select("*")
+            .eq("creator_id", user.id)
+        )
             
         return resp.data
     except Exception as e:
@@ -455,11 +706,12 @@ async def upload_challenge_background_photo(
     Upload or update the background photo for a challenge.
     The user must be the creator of the challenge.
     """
-    challenge_resp = supabase.table("challenges") \
-        .select("creator_id, background_photo") \
-        .eq("id", challenge_id) \
-        .single() \
-        .execute()
+    challenge_resp = await execute(
+        supabase.table("challenges")
+        .select("creator_id, background_photo")
+        .eq("id", challenge_id)
+        .single()
+    )
 
     if not challenge_resp.data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
@@ -477,28 +729,42 @@ async def upload_challenge_background_photo(
     uploaded_filename = await upload_file("challenges", file, f"challenge_{challenge_id}_{user.id}")
     new_photo_data = ["background_photo", uploaded_filename]
 
-    updated_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
-    supabase.table("challenges") \
+    updated_at = db_timestamp()
+    await execute(
+        supabase.table("challenges")
         .update({
             "background_photo": new_photo_data,
             "updated_at": updated_at
-        }) \
-        .eq("id", challenge_id) \
-        .execute()
+        })
+        .eq("id", challenge_id)
+    )
+    invalidate_challenge(challenge_id)
 
-    return supabase.table("challenges") \
-        .select("*") \
-        .eq("id", challenge_id) \
-        .single() \
-        .execute().data
+    return (await execute(
+        supabase.table("challenges")
+        .select("*")
+        .eq("id", challenge_id)
+        .single()
+    )).data
 
 @router.get("/{challenge_id}/posts", response_model=List[PostOut])
-async def list_posts_for_challenge(challenge_id: str, supabase=Depends(get_supabase)):
+async def list_posts_for_challenge(
+    challenge_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    supabase=Depends(get_supabase)
+):
     """
-    List all posts for a specific challenge.
+    List posts for a specific challenge, newest first.
+    
+    Pages are keyset-paginated: pass the X-Next-Cursor header of one page as
+    `cursor` to get the next. The header is absent on the last page.
     
     Args:
         challenge_id (str): UUID of the challenge
+        limit (int): Maximum number of posts to return (max 100)
+        cursor (str, optional): Cursor from the previous page
         supabase: Supabase client dependency
         
     Returns:
@@ -509,15 +775,18 @@ async def list_posts_for_challenge(challenge_id: str, supabase=Depends(get_supab
         HTTPException: 500 for other errors
     """
     try:
-        challenge_resp = supabase.table("challenges").select("id").eq("id", challenge_id).single().execute()
-        if not challenge_resp.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
-
-        posts_resp = supabase.table("posts").select("*").eq("challenge_id", challenge_id).execute()
+        posts_resp = await execute(
+            apply_cursor(supabase.table("posts").select("*").eq("challenge_id", challenge_id), cursor, limit)
+        )
         
-        if posts_resp.data is None:
+        if not posts_resp.data:
+            # Only an empty page needs telling apart from a missing challenge
+            await get_challenge_or_404(challenge_id)
             return []
 
+        cursor_token = next_cursor(posts_resp.data, limit)
+        if cursor_token:
+            response.headers[NEXT_CURSOR_HEADER] = cursor_token
         return posts_resp.data
     except HTTPException as http_exc:
         raise http_exc
@@ -526,22 +795,26 @@ async def list_posts_for_challenge(challenge_id: str, supabase=Depends(get_supab
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error fetching posts for challenge: {str(e)}")
 
 @router.get("/{challenge_id}/ranking/{metric}", response_model=list[ChallengeParticipantOut])
-async def get_challenge_ranking(challenge_id: str, metric: str, supabase=Depends(get_supabase)):
-    valid_metrics = ["points", "check_ins", "streak"]
-
-    if metric not in valid_metrics:
+async def get_challenge_ranking(
+    challenge_id: str,
+    metric: str,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    supabase=Depends(get_supabase)
+):
+    if metric not in RANKING_METRICS:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ranking metric.")
 
     try:
-        challenge = supabase.table("challenges").select("id").eq("id", challenge_id).single().execute()
-        if not challenge.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Challenge not found")
-        
-        resp = supabase.table("challenge_participants") \
-            .select("*") \
-            .eq("challenge_id", challenge_id) \
-            .order(metric, desc=True) \
-            .execute()
+        resp = await execute(
+            supabase.table("challenge_participants")
+            .select("*")
+            .eq("challenge_id", challenge_id)
+            .order(metric, desc=True)
+            .range(offset, offset + limit - 1)
+        )
+        if not resp.data:
+            await get_challenge_or_404(challenge_id)
             
         return resp.data
     except Exception as e:
@@ -588,13 +861,17 @@ async def upload_post_media_base64(
 
 @router.get("/search/challenges", response_model=list[ChallengeOut])
 async def vector_search(
-    query: str
+    query: str,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
 ):
     """
     Searching for Challenges
 
     Args:
         query: search keyword
+        limit (int): Maximum number of challenges to return (max 100)
+        offset (int): Number of matches to skip
 
     Returns:
         List[ChallengeOut]
@@ -604,10 +881,14 @@ async def vector_search(
     """
 
     try:
-        query_embedding = get_embedding(query)
+        query_embedding = await run_in_threadpool(get_embedding, query)
         #print(query_embedding)
 
-        resp = supabase.rpc("search_challenges", {"query_embedding": query_embedding}).execute()
+        # Page in Postgres so only the requested matches cross the wire
+        resp = await execute(
+            supabase.rpc("search_challenges", {"query_embedding": query_embedding})
+            .range(offset, offset + limit - 1)
+        )
 
         #print("Raw Response from Supabase:", resp)
         return resp.data
@@ -618,32 +899,43 @@ async def vector_search(
 @router.post("/challenge/embeddings", response_model=list[ChallengeOut])
 async def update_embeddings():
     try:
-        resp = supabase.table("challenges").select("*").execute()
-        for challenge in resp.data:
-            combined_str = f"{challenge["title"]} {challenge["description"]} {challenge["location"]}"
-            content_embedding = get_embedding(combined_str)
-            challenge["embedding"] = content_embedding
-            respond = supabase.table("challenges").update(challenge).eq("id", challenge["id"]).execute()
-        return resp.data
+        resp = await execute(supabase.table("challenges").select("id, title, description, location"))
+        if not resp.data:
+            return []
+
+        # Encode every challenge in one model batch, then write back only the
+        # embedding column. Writing whole rows would overwrite the
+        # trigger-maintained counters with stale values and re-insert any
+        # challenge deleted while the batch was encoding.
+        texts = [f"{c['title']} {c['description']} {c['location']}" for c in resp.data]
+        embeddings = await run_in_threadpool(embedding_model.encode, texts)
+        updated = await execute_all(*(
+            supabase.table("challenges").update({"embedding": embedding.tolist()}).eq("id", challenge["id"])
+            for challenge, embedding in zip(resp.data, embeddings)
+        ))
+
+        challenge_cache.clear()
+        # Challenges deleted in the meantime come back empty
+        return [result.data[0] for result in updated if result.data]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating embeddings {str(e)}")
 
 @router.post("/{challenge_id}/test-notification", status_code=status.HTTP_200_OK)
-async def test_challenge_notification(challenge_id: str, user=Depends(get_current_user)):
+async def test_challenge_notification(
+    challenge_id: str,
+    challenge: dict = Depends(get_challenge_or_404),
+    user=Depends(get_current_user)
+):
     """
     Sends a test notification to the challenge creator.
     """
-    challenge_resp = supabase.table("challenges").select("title").eq("id", challenge_id).single().execute()
-    if not challenge_resp.data:
-        raise HTTPException(status_code=404, detail="Challenge not found")
-    
     if not user.fcm_token:
         raise HTTPException(status_code=400, detail="User does not have an FCM token.")
 
     send_fcm_notification(
         token=user.fcm_token,
         title="Test Notification",
-        body=f"This is a test notification for the challenge: {challenge_resp.data['title']}",
+        body=f"This is a test notification for the challenge: {challenge['title']}",
         data={"challenge_id": challenge_id}
     )
     return {"message": "Test notification sent."}
@@ -690,7 +982,7 @@ async def run_e2e_notification_test(background_tasks: BackgroundTasks, supabase_
 
             # Step 3: User 1 joins
             print("\nStep 3: User 1 joining...")
-            user1_obj = UserOut(**supabase_client.table("users").select("*").eq("id", user1.user.id).single().execute().data)
+            user1_obj = UserOut.from_row(supabase_client.table("users").select("*").eq("id", user1.user.id).single().execute().data)
             join_challenge_sync(challenge_id, user1_obj, supabase_client)
             print("  - User 1 joined, notifications scheduled.")
 
@@ -719,15 +1011,11 @@ async def run_e2e_notification_test(background_tasks: BackgroundTasks, supabase_
 
     def join_challenge_sync(challenge_id, user, db_client):
         db_client.table("challenge_participants").insert({"challenge_id": challenge_id, "user_id": user.id}).execute()
-        challenge_data = db_client.table("challenges").select("*").eq("id", challenge_id).single().execute().data
+        challenge_data = db_client.table("challenges").select("id, check_in_time").eq("id", challenge_id).single().execute().data
         _schedule_participant_notifications(user, challenge_data, get_scheduler_client(), db_client)
 
     def delete_challenge_sync(challenge_id, user, db_client):
-        all_jobs = db_client.table("participant_jobs").select("user_id").eq("challenge_id", challenge_id).execute().data
-        if all_jobs:
-            client = get_scheduler_client()
-            for record in all_jobs:
-                _cancel_participant_notifications(record['user_id'], challenge_id, client, db_client)
+        _cancel_challenge_notifications(challenge_id, db_client)
         db_client.table("challenges").delete().eq("id", challenge_id).execute()
 
 
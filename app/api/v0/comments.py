@@ -1,9 +1,9 @@
-from datetime import datetime
-
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 
+from app.api.v0.posts import get_post_owner
 from app.core.config import supabase
+from app.core.db import db_timestamp, execute
 from app.core.deps import get_current_user
 from app.schemas.comments import CommentCreate, CommentOut
 
@@ -32,11 +32,10 @@ async def create_comment(payload: CommentCreate, user=Depends(get_current_user))
     """
     try:
         record = payload.model_dump()
-        # Convert datetime to string to make it JSON serializable
-        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")
+        now = db_timestamp()
         record.update({"user_id": user.id, "created_at": now})
         
-        resp = supabase.table("comments").insert(record).execute()
+        resp = await execute(supabase.table("comments").insert(record))
         
         if not resp.data:
             raise HTTPException(status_code=400, detail="Failed to create comment")
@@ -54,13 +53,15 @@ async def list_comments(post_id: str = None):
         post_id (str, optional): Filter comments by post ID
         
     Returns:
-        list[CommentOut]: List of comment objects
+        list[CommentOut]: List of comment objects; a post's comments come
+        oldest first
     """
     try:
         query = supabase.table("comments").select("*")
         if post_id:
-            query = query.eq("post_id", post_id)
-        resp = query.execute()
+            # Read in order straight off idx_comments_post_created
+            query = query.eq("post_id", post_id).order("created_at")
+        resp = await execute(query)
         return resp.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching comments: {str(e)}")
@@ -80,7 +81,7 @@ async def get_comment(comment_id: str):
         HTTPException: 404 if comment not found
     """
     try:
-        resp = supabase.table("comments").select("*").eq("id", comment_id).single().execute()
+        resp = await execute(supabase.table("comments").select("*").eq("id", comment_id).single())
         return resp.data
     except Exception as e:
         raise HTTPException(status_code=404, detail="Comment not found")
@@ -104,7 +105,7 @@ async def update_comment(comment_id: str, payload: CommentUpdate, user=Depends(g
     """
     try:
         # Check if comment exists and belongs to user
-        exists = supabase.table("comments").select("user_id").eq("id", comment_id).single().execute()
+        exists = await execute(supabase.table("comments").select("user_id").eq("id", comment_id).single())
         
         if exists.data["user_id"] != user.id:
             raise HTTPException(status_code=403, detail="Not authorized to update this comment")
@@ -113,10 +114,10 @@ async def update_comment(comment_id: str, payload: CommentUpdate, user=Depends(g
         update_data = {"content": payload.content}
         
         # Update the comment
-        supabase.table("comments").update(update_data).eq("id", comment_id).execute()
+        await execute(supabase.table("comments").update(update_data).eq("id", comment_id))
         
         # Return updated comment
-        updated_comment = supabase.table("comments").select("*").eq("id", comment_id).single().execute()
+        updated_comment = await execute(supabase.table("comments").select("*").eq("id", comment_id).single())
         return updated_comment.data
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -141,7 +142,7 @@ async def delete_comment(comment_id: str, user=Depends(get_current_user)):
     """
     try:
         # Get the comment details including post_id and user_id
-        comment = supabase.table("comments").select("user_id,post_id").eq("id", comment_id).single().execute()
+        comment = await execute(supabase.table("comments").select("user_id,post_id").eq("id", comment_id).single())
         
         if not comment.data:
             raise HTTPException(status_code=404, detail="Comment not found")
@@ -155,8 +156,7 @@ async def delete_comment(comment_id: str, user=Depends(get_current_user)):
         # Check if user is the post owner (has permission to moderate their own post)
         post_owner = False
         if not is_comment_author:
-            post = supabase.table("posts").select("user_id").eq("id", post_id).single().execute()
-            post_owner = post.data and post.data["user_id"] == user.id
+            post_owner = await get_post_owner(post_id, supabase) == user.id
         
         # Allow delete if user is either comment author or post owner
         if not (is_comment_author or post_owner):
@@ -166,7 +166,7 @@ async def delete_comment(comment_id: str, user=Depends(get_current_user)):
             )
             
         # Delete the comment
-        supabase.table("comments").delete().eq("id", comment_id).execute()
+        await execute(supabase.table("comments").delete().eq("id", comment_id))
         return None
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -1,11 +1,12 @@
 import random
-from datetime import datetime
 from typing import List, Optional
 
 from fastapi import (APIRouter, Depends, File, Form, HTTPException, UploadFile,
                      status)
 
+from app.api.v0.posts import get_post_owner
 from app.core.config import supabase
+from app.core.db import db_timestamp, execute
 from app.core.deps import get_current_user, get_supabase
 from app.core.media import delete_file, upload_base64_image, upload_file
 from app.schemas.endorsements import (EndorsementCreate, EndorsementOut,
@@ -20,7 +21,7 @@ router = APIRouter(tags=["endorsements"])
     status_code=status.HTTP_201_CREATED,
     summary="Create endorsement requests for a post",
 )
-def request_endorsements(
+async def request_endorsements(
     post_id: str,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -42,32 +43,22 @@ def request_endorsements(
     """
     try:
         # Check if post exists and belongs to current user
-        post = supabase.table("posts").select("*").eq("id", post_id).execute()
-        
-        if not post.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-            
-        if post.data[0]["user_id"] != current_user.id:
+        if await get_post_owner(post_id, supabase) != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only the post owner can request endorsements"
             )
             
-        # Get user's friends (people the user follows AND who follow the user back)
-        follows_query = supabase.table("follows").select("followed_id").eq("follower_id", current_user.id).execute()
-        following_ids = [follow["followed_id"] for follow in follows_query.data]
+        # Get user's friends (people the user follows AND who follow the user back);
+        # the intersection runs in the database, see scripts/v0/make_friends_rpc.sql
+        friends_resp = await execute(supabase.rpc("mutual_follows", {"p_user_id": current_user.id}))
+        friends = [row["user_id"] for row in friends_resp.data]
         
-        if not following_ids:
+        if not friends:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="You need to have friends to request endorsements"
             )
-            
-        # Find mutual follows (friends)
-        followers_query = supabase.table("follows").select("follower_id").eq("followed_id", current_user.id)\
-            .in_("follower_id", following_ids).execute()
-        
-        friends = [follow["follower_id"] for follow in followers_query.data]
         
         if len(friends) < 3:
             raise HTTPException(
@@ -79,46 +70,28 @@ def request_endorsements(
         selected_friends = random.sample(friends, 3)
         
         # Create endorsement requests
-        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
-        endorsements = []
+        now = db_timestamp()
         
-        for friend_id in selected_friends:
-            endorsement_data = {
-                "post_id": post_id,
-                "endorser_id": friend_id,
-                "status": "pending",
-                "created_at": now
-            }
-            
-            # Check if an endorsement request already exists
-            existing = supabase.table("post_endorsements")\
-                .select("*")\
-                .eq("post_id", post_id)\
-                .eq("endorser_id", friend_id)\
-                .execute()
-                
-            if existing.data:
-                endorsements.append(existing.data[0])
-                continue
-                
-            # Insert new endorsement request
-            result = supabase.table("post_endorsements").insert(endorsement_data).execute()
-            endorsements.append(result.data[0])
-            
-            # Create notification for the endorser
-            notification_data = {
-                "type": "endorsement_request",
-                "user_id": friend_id,
-                "triggered_by_user_id": current_user.id,
-                "post_id": post_id,
-                "message": f"{current_user.username} has requested your endorsement on their post",
-                "is_read": False,
-                "created_at": now,
-                "status": "pending"
-            }
-            
-            supabase.table("notifications").insert(notification_data).execute()
+        # Look up existing requests for all selected friends at once
+        existing = await execute(
+            supabase.table("post_endorsements")
+            .select("*")
+            .eq("post_id", post_id)
+            .in_("endorser_id", selected_friends)
+        )
+        by_endorser = {row["endorser_id"]: row for row in existing.data}
         
+        new_friends = [friend_id for friend_id in selected_friends if friend_id not in by_endorser]
+        if new_friends:
+            # Insert the missing requests in one batch; their notifications are
+            # written by a trigger, see scripts/v0/add_endorsement_notify_trigger.sql
+            endorsement_base = {"post_id": post_id, "status": "pending", "created_at": now}
+            result = await execute(supabase.table("post_endorsements").insert([
+                {**endorsement_base, "endorser_id": friend_id} for friend_id in new_friends
+            ]))
+            by_endorser.update((row["endorser_id"], row) for row in result.data)
+        
+        endorsements = [by_endorser[friend_id] for friend_id in selected_friends]
         return endorsements
     
     except Exception as e:
@@ -134,7 +107,7 @@ def request_endorsements(
     response_model=List[EndorsementOut],
     summary="Get all endorsements for a post",
 )
-def get_post_endorsements(
+async def get_post_endorsements(
     post_id: str,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -152,16 +125,14 @@ def get_post_endorsements(
     """
     try:
         # Check if post exists and belongs to current user or user is an endorser
-        post = supabase.table("posts").select("user_id").eq("id", post_id).execute()
-        
-        if not post.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        await get_post_owner(post_id, supabase)
             
         # Get all endorsements for the post
-        endorsements = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("post_id", post_id)\
-            .execute()
+        endorsements = await execute(
+            supabase.table("post_endorsements")
+            .select("*")
+            .eq("post_id", post_id)
+        )
             
         return endorsements.data
     except Exception as e:
@@ -177,7 +148,7 @@ def get_post_endorsements(
     response_model=List[EndorsementOut],
     summary="Get your pending endorsement requests",
 )
-def get_pending_endorsements(
+async def get_pending_endorsements(
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
 ):
@@ -192,11 +163,12 @@ def get_pending_endorsements(
         List[EndorsementOut]: List of pending endorsements
     """
     try:
-        endorsements = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("endorser_id", current_user.id)\
-            .eq("status", "pending")\
-            .execute()
+        endorsements = await execute(
+            supabase.table("post_endorsements")
+            .select("*")
+            .eq("endorser_id", current_user.id)
+            .eq("status", "pending")
+        )
             
         return endorsements.data
     except Exception as e:
@@ -237,11 +209,12 @@ async def update_endorsement(
     """
     try:
         # Check if endorsement exists and belongs to current user
-        endorsement_resp = supabase.table("post_endorsements")\
-            .select("*, post_id(user_id)")\
-            .eq("id", endorsement_id)\
-            .single()\
-            .execute()
+        endorsement_resp = await execute(
+            supabase.table("post_endorsements")
+            .select("endorser_id, selfie_url, post_id(user_id)")
+            .eq("id", endorsement_id)
+            .single()
+        )
             
         if not endorsement_resp.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
@@ -286,22 +259,19 @@ async def update_endorsement(
             new_selfie_data_to_store = None
         
         update_data["selfie_url"] = new_selfie_data_to_store
-        update_data["endorsed_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f") if status == EndorsementStatus.ENDORSED else None
+        update_data["endorsed_at"] = db_timestamp() if status == EndorsementStatus.ENDORSED else None
 
-        # Update the endorsement
-        updated_endorsement_resp = supabase.table("post_endorsements")\
-            .update(update_data)\
-            .eq("id", endorsement_id)\
-            .execute()
-       
-        # Fetch the fully updated endorsement to return
-        final_endorsement = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("id", endorsement_id)\
-            .single()\
-            .execute()
+        # Update the endorsement; the UPDATE returns the new row, so no
+        # follow-up select is needed
+        updated_endorsement_resp = await execute(
+            supabase.table("post_endorsements")
+            .update(update_data)
+            .eq("id", endorsement_id)
+        )
+        if not updated_endorsement_resp.data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
 
-        return final_endorsement.data
+        return updated_endorsement_resp.data[0]
 
     except HTTPException:
         raise
@@ -340,11 +310,12 @@ async def upload_endorsement_selfie(
     """
     try:
         # Check if endorsement exists and belongs to current user
-        endorsement_resp = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("id", endorsement_id)\
-            .single()\
-            .execute()
+        endorsement_resp = await execute(
+            supabase.table("post_endorsements")
+            .select("endorser_id, selfie_url")
+            .eq("id", endorsement_id)
+            .single()
+        )
             
         if not endorsement_resp.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
@@ -369,15 +340,15 @@ async def upload_endorsement_selfie(
         uploaded_filename = await upload_file("selfie_url", selfie, current_user.id, folder=endorsement_id)
         new_selfie_to_store = ["selfie_url", uploaded_filename]
         
-        # Update endorsement
-        supabase.table("post_endorsements")\
-            .update({"selfie_url": new_selfie_to_store})\
-            .eq("id", endorsement_id)\
-            .execute()
-            
-        # Fetch and return the updated endorsement object to use EndorsementOut model
-        updated_record = supabase.table("post_endorsements").select("*").eq("id", endorsement_id).single().execute()
-        return updated_record.data
+        # Update endorsement and return the updated row from the same request
+        updated_record = await execute(
+            supabase.table("post_endorsements")
+            .update({"selfie_url": new_selfie_to_store})
+            .eq("id", endorsement_id)
+        )
+        if not updated_record.data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
+        return updated_record.data[0]
 
     except HTTPException:
         raise
@@ -416,11 +387,12 @@ async def upload_endorsement_selfie_base64(
     """
     try:
         # Check if endorsement exists and belongs to current user
-        endorsement_resp = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("id", endorsement_id)\
-            .single()\
-            .execute()
+        endorsement_resp = await execute(
+            supabase.table("post_endorsements")
+            .select("endorser_id, selfie_url")
+            .eq("id", endorsement_id)
+            .single()
+        )
             
         if not endorsement_resp.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
@@ -445,15 +417,15 @@ async def upload_endorsement_selfie_base64(
         uploaded_filename = await upload_base64_image("selfie_url", base64_image, current_user.id, folder=endorsement_id)
         new_selfie_to_store = ["selfie_url", uploaded_filename]
         
-        # Update endorsement
-        supabase.table("post_endorsements")\
-            .update({"selfie_url": new_selfie_to_store})\
-            .eq("id", endorsement_id)\
-            .execute()
-            
-        # Fetch and return the updated endorsement object to use EndorsementOut model
-        updated_record = supabase.table("post_endorsements").select("*").eq("id", endorsement_id).single().execute()
-        return updated_record.data
+        # Update endorsement and return the updated row from the same request
+        updated_record = await execute(
+            supabase.table("post_endorsements")
+            .update({"selfie_url": new_selfie_to_store})
+            .eq("id", endorsement_id)
+        )
+        if not updated_record.data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
+        return updated_record.data[0]
 
     except HTTPException:
         raise
@@ -1,8 +1,10 @@
-from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from postgrest.exceptions import APIError
 
+from app.api.v0.users import invalidate_profile
+from app.core.db import db_timestamp, execute
 from app.core.deps import get_current_user, get_supabase
 from app.schemas.follows import FollowCreate, FollowOut
 from app.schemas.users import UserOut
@@ -15,7 +17,7 @@ router = APIRouter(tags=["follows"])
     status_code=status.HTTP_201_CREATED,
     summary="Follow a user (idempotent)",
 )
-def follow_user(
+async def follow_user(
     payload: FollowCreate,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -31,41 +33,54 @@ def follow_user(
         idempotency_key: Optional key for idempotent requests
         
     Returns:
-        FollowOut: The created follow relationship
+        FollowOut: The created follow relationship, or the existing one
         
     Raises:
         HTTPException: 400 if user tries to follow themselves
+        HTTPException: 404 if the user to follow does not exist
         HTTPException: 400 if database operation fails
     """
     # The followed_id is guaranteed to be set by the model_validator in FollowCreate
     if payload.followed_id == current_user.id:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Cannot follow yourself")
 
+    now = db_timestamp()
+    data = {
+        "follower_id": current_user.id, 
+        "followed_id": payload.followed_id,
+        "created_at": now
+    }
+    
+    # follows_unique (follower_id, followed_id) makes the insert its own
+    # duplicate check and the users FK its own existence check
     try:
-        # First check if the follow relationship already exists
-        existing = supabase.table("follows").select("*") \
-            .eq("follower_id", current_user.id) \
-            .eq("followed_id", payload.followed_id) \
-            .execute()
-            
-        # If relationship exists, return it
-        if existing.data and len(existing.data) > 0:
-            return existing.data[0]
-            
-        # Otherwise create new follow relationship
-        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%f")
-        data = {
-            "follower_id": current_user.id, 
-            "followed_id": payload.followed_id,
-            "created_at": now
-        }
+        res = await execute(
+            supabase.table("follows")
+            .upsert(data, on_conflict="follower_id,followed_id", ignore_duplicates=True)
+        )
         
-        res = supabase.table("follows").insert(data).execute()
+        if res.data:
+            # Both profiles' follower/following counts changed
+            invalidate_profile(current_user.id, payload.followed_id)
+            return res.data[0]
         
-        if not res.data:
+        # Already following: return the existing relationship
+        existing = await execute(
+            supabase.table("follows").select("*")
+            .eq("follower_id", current_user.id)
+            .eq("followed_id", payload.followed_id)
+            .limit(1)
+        )
+        if not existing.data:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Failed to create follow relationship")
-            
-        return res.data[0]
+        return existing.data[0]
+    except HTTPException:
+        raise
+    except APIError as e:
+        # 23503: no such user (FK violation), 22P02: malformed user id
+        if e.code in ("23503", "22P02"):
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error creating follow relationship: {e.message}")
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error creating follow relationship: {str(e)}")
 
@@ -74,7 +89,7 @@ def follow_user(
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Unfollow a user",
 )
-def unfollow_user(
+async def unfollow_user(
     follow_id: str,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -91,21 +106,27 @@ def unfollow_user(
         Response: 204 No Content on success
         
     Raises:
+        HTTPException: 404 if the follow relationship does not exist
         HTTPException: 403 if user is not authorized to delete the follow
         HTTPException: 400 if database operation fails
     """
     try:
-        # Check if follow relationship exists and belongs to current user
-        rec = supabase.table("follows").select("follower_id").eq("id", follow_id).execute()
+        # The delete is scoped to the caller's own follows, so it is its own
+        # ownership check and hands back the row it removed
+        deleted = await execute(
+            supabase.table("follows").delete()
+            .eq("id", follow_id)
+            .eq("follower_id", current_user.id)
+        )
         
-        if not rec.data or len(rec.data) == 0:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, "Follow relationship not found")
-            
-        if rec.data[0]["follower_id"] != current_user.id:
+        if not deleted.data:
+            # Nothing removed: only now tell a missing row from someone else's
+            rec = await execute(supabase.table("follows").select("id").eq("id", follow_id).limit(1))
+            if not rec.data:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "Follow relationship not found")
             raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to delete this follow relationship")
             
-        # Delete the follow relationship
-        supabase.table("follows").delete().eq("id", follow_id).execute()
+        invalidate_profile(current_user.id, deleted.data[0]["followed_id"])
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -117,7 +138,7 @@ def unfollow_user(
     response_model=List[UserOut],
     summary="Get followers of a specific user",
 )
-def get_user_followers(
+async def get_user_followers(
     user_id: str,
     supabase=Depends(get_supabase),
 ):
@@ -135,22 +156,15 @@ def get_user_followers(
         HTTPException: 400 if database operation fails
     """
     try:
-        # Fetch follower_ids of users who follow the given user_id
-        follows_res = supabase.table("follows").select("follower_id").eq("followed_id", user_id).execute()
-        if not follows_res.data:
-            return []
-
-        follower_ids = [follow['follower_id'] for follow in follows_res.data]
-        if not follower_ids:
-            return []
-
-        # Fetch user details for those follower_ids
-        users_res = supabase.table("users").select("id, username, full_name, avatar_url, email, bio, updated_at").in_("id", follower_ids).execute()
-        
-        if not users_res.data:
-            return []
+        # Embed each follower's profile through the follower_id foreign key
+        # so the follow rows and user details come back in one request
+        follows_res = await execute(
+            supabase.table("follows")
+            .select("user:users!follower_id(id, username, full_name, avatar_url, email, bio, updated_at)")
+            .eq("followed_id", user_id)
+        )
             
-        return users_res.data
+        return [follow["user"] for follow in follows_res.data if follow.get("user")]
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error fetching followers: {str(e)}")
 
@@ -159,7 +173,7 @@ def get_user_followers(
     response_model=List[UserOut],
     summary="Get users a specific user is following",
 )
-def get_user_following(
+async def get_user_following(
     user_id: str,
     supabase=Depends(get_supabase),
 ):
@@ -177,21 +191,13 @@ def get_user_following(
         HTTPException: 400 if database operation fails
     """
     try:
-        # Fetch followed_ids of users whom the given user_id is following
-        follows_res = supabase.table("follows").select("followed_id").eq("follower_id", user_id).execute()
-        if not follows_res.data:
-            return []
-
-        followed_ids = [follow['followed_id'] for follow in follows_res.data]
-        if not followed_ids:
-            return []
-
-        # Fetch user details for those followed_ids
-        users_res = supabase.table("users").select("id, username, full_name, avatar_url, email, bio, updated_at").in_("id", followed_ids).execute()
-        
-        if not users_res.data:
-            return []
+        # Embed each followed user's profile through the followed_id foreign key
+        follows_res = await execute(
+            supabase.table("follows")
+            .select("user:users!followed_id(id, username, full_name, avatar_url, email, bio, updated_at)")
+            .eq("follower_id", user_id)
+        )
             
-        return users_res.data
+        return [follow["user"] for follow in follows_res.data if follow.get("user")]
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error fetching followed users: {str(e)}")
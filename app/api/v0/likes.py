@@ -2,7 +2,9 @@ import logging
 from typing import List
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from postgrest.exceptions import APIError
 
+from app.core.db import execute
 from app.core.deps import get_current_user, get_supabase
 from app.schemas.likes import LikeCreate, LikeOut
 from app.schemas.users import UserOut
@@ -15,7 +17,7 @@ router = APIRouter(tags=["likes"])
     status_code=status.HTTP_201_CREATED,
     summary="Like a post (idempotent)",
 )
-def like_post(
+async def like_post(
     payload: LikeCreate,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -34,25 +36,38 @@ def like_post(
         LikeOut: The created like record
         
     Raises:
+        HTTPException: 404 if the post does not exist
         HTTPException: 400 if database operation fails
     """
     data = {"user_id": current_user.id, "post_id": payload.post_id}
     try:
-        # First check if like already exists
-        existing = supabase.table("likes").select("*") \
-            .eq("user_id", current_user.id) \
-            .eq("post_id", payload.post_id) \
-            .execute()
+        # likes_unique makes the insert its own duplicate check and the posts
+        # FK its own existence check; see scripts/v0/add_like_constraints.sql
+        res = await execute(
+            supabase.table("likes")
+            .upsert(data, on_conflict="user_id,post_id,comment_id", ignore_duplicates=True)
+        )
+        if res.data:
+            return res.data[0]
             
-        # If like exists, return it
-        if existing.data and len(existing.data) > 0:
-            return existing.data[0]
-            
-        # Otherwise create new like
-        res = supabase.table("likes").insert(data).execute()
-        if not res.data:
+        # Already liked: return the existing like
+        existing = await execute(
+            supabase.table("likes").select("*")
+            .eq("user_id", current_user.id)
+            .eq("post_id", payload.post_id)
+            .is_("comment_id", "null")
+            .limit(1)
+        )
+        if not existing.data:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Failed to create like")
-        return res.data[0]
+        return existing.data[0]
+    except APIError as e:
+        # 23503: no such post (FK violation), 22P02: malformed post id
+        if e.code in ("23503", "22P02"):
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Post not found")
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error: {e.message}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error: {str(e)}")
 
@@ -61,7 +76,7 @@ def like_post(
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Remove a like",
 )
-def unlike_post(
+async def unlike_post(
     post_id: str,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -85,16 +100,13 @@ def unlike_post(
         HTTPException: 400 if database operation fails
     """
     try:
-        # Check if like exists and belongs to current user
-        rec = supabase.table("likes").select("*").eq("user_id", current_user.id).eq("post_id", post_id).execute()
+        # Delete the like; filtering on current_user.id scopes the delete to the
+        # caller's own like, and an empty result means there was none
+        rec = await execute(supabase.table("likes").delete().eq("user_id", current_user.id).eq("post_id", post_id))
         
-        if not rec.data or len(rec.data) == 0:
+        if not rec.data:
             raise HTTPException(status.HTTP_404_NOT_FOUND, "Like not found")
         
-        # No need to check user_id again since we already filtered by current_user.id
-        
-        # Delete the like
-        supabase.table("likes").delete().eq("user_id", current_user.id).eq("post_id", post_id).execute()
         return Response(status_code=status.HTTP_204_NO_CONTENT)
         
     except Exception as e:
@@ -103,7 +115,7 @@ def unlike_post(
         raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error: {str(e)}")
     
 @router.get("/me/{post_id}")
-def get_MyLike(
+async def get_MyLike(
     post_id: str,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -127,9 +139,14 @@ def get_MyLike(
     """
     try:
         # Check if current user has liked this post
-        rec = supabase.table("likes").select("*").eq("user_id", current_user.id).eq("post_id", post_id).execute()
+        rec = await execute(
+            supabase.table("likes").select("id")
+            .eq("user_id", current_user.id)
+            .eq("post_id", post_id)
+            .limit(1)
+        )
         
-        if rec.data and len(rec.data) > 0:
+        if rec.data:
             return {
                 "liked": True,
                 "like_id": rec.data[0].get("id")  # or whatever your like ID field is called
@@ -150,7 +167,7 @@ def get_MyLike(
     response_model=List[UserOut],
     summary="Get users who liked a specific post",
 )
-def get_users_who_liked_post(
+async def get_users_who_liked_post(
     post_id: str,
     supabase=Depends(get_supabase),
 ):
@@ -169,22 +186,16 @@ def get_users_who_liked_post(
         HTTPException: 404 if post not found (implicitly, if no likes exist)
     """
     try:
-        # Fetch user_ids of users who liked the post
-        likes_res = supabase.table("likes").select("user_id").eq("post_id", post_id).execute()
-        if not likes_res.data:
-            return [] # Return empty list if no likes for the post
-
-        user_ids = [like['user_id'] for like in likes_res.data]
-        if not user_ids:
-            return []
-
-        # Fetch user details for those user_ids
-        users_res = supabase.table("users").select("id, username, full_name, avatar_url, email, bio, updated_at").in_("id", user_ids).execute()
+        # Embed the liker's profile in each like row so one request returns
+        # both; a user can hold several likes on a post (post and comments)
+        likes_res = await execute(
+            supabase.table("likes")
+            .select("user:users!user_id(id, username, full_name, avatar_url, email, bio, updated_at)")
+            .eq("post_id", post_id)
+        )
         
-        if not users_res.data:
-            return []
-            
-        return users_res.data
+        users = {like["user"]["id"]: like["user"] for like in likes_res.data if like.get("user")}
+        return list(users.values())
     except Exception as e:
 
         logging.error(f"Error fetching users who liked post {post_id}: {str(e)}")
@@ -2,7 +2,10 @@ from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
 
+from app.core.db import db_timestamp, execute
 from app.core.deps import get_current_user, get_supabase
 from app.schemas.notifications import NotificationOut, NotificationStatus
 
@@ -13,7 +16,7 @@ router = APIRouter(tags=["notifications"])
     response_model=List[NotificationOut],
     summary="List your notifications (paginated)",
 )
-def list_notifications(
+async def list_notifications(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     current_user=Depends(get_current_user),
@@ -38,12 +41,13 @@ def list_notifications(
         start = (page - 1) * per_page
         end = start + per_page - 1
         
-        resp = supabase.table("notifications")\
-            .select("*") \
-            .eq("user_id", current_user.id) \
-            .order("created_at", desc=True) \
-            .range(start, end) \
-            .execute()
+        resp = await execute(
+            supabase.table("notifications")
+            .select("*")
+            .eq("user_id", current_user.id)
+            .order("created_at", desc=True)
+            .range(start, end)
+        )
             
         # Transform the data to match the expected schema
         transformed_data = []
@@ -67,7 +71,7 @@ def list_notifications(
     status_code=status.HTTP_200_OK,
     summary="Mark a single notification as read",
 )
-def mark_read(
+async def mark_read(
     notification_id: str,
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
@@ -89,22 +93,25 @@ def mark_read(
     """
     try:
         # Check if notification exists and belongs to user
-        rec = supabase.table("notifications")\
-            .select("user_id")\
-            .eq("id", notification_id)\
-            .execute()
-            
-        if not rec.data or len(rec.data) == 0:
+        try:
+            rec = await execute(
+                supabase.table("notifications")
+                .select("user_id")
+                .eq("id", notification_id)
+                .single()
+            )
+        except APIError:
             raise HTTPException(status.HTTP_404_NOT_FOUND, "Notification not found")
             
-        if rec.data[0]["user_id"] != current_user.id:
+        if rec.data["user_id"] != current_user.id:
             raise HTTPException(status.HTTP_403_FORBIDDEN, "Not authorized to mark this notification as read")
             
         # Update notification
-        supabase.table("notifications")\
-            .update({"is_read": True})\
-            .eq("id", notification_id)\
-            .execute()
+        await execute(
+            supabase.table("notifications")
+            .update({"is_read": True})
+            .eq("id", notification_id)
+        )
             
         return {"status": "ok"}
     except Exception as e:
@@ -117,7 +124,7 @@ def mark_read(
     status_code=status.HTTP_200_OK,
     summary="Mark all your notifications as read",
 )
-def mark_all_read(
+async def mark_all_read(
     current_user=Depends(get_current_user),
     supabase=Depends(get_supabase),
 ):
@@ -135,21 +142,16 @@ def mark_all_read(
         HTTPException: 400 if database operation fails
     """
     try:
-        # Get the count of unread notifications
-        unread_count = supabase.table("notifications")\
-            .select("id")\
-            .eq("user_id", current_user.id)\
-            .eq("is_read", False)\
-            .execute()
-            
-        # Update all notifications to read
-        supabase.table("notifications")\
-            .update({"is_read": True})\
-            .eq("user_id", current_user.id)\
-            .eq("is_read", False)\
-            .execute()
+        # Mark everything unread as read; the exact count comes back in the
+        # response header, so no rows need to be fetched or counted separately
+        resp = await execute(
+            supabase.table("notifications")
+            .update({"is_read": True}, count="exact", returning=ReturnMethod.minimal)
+            .eq("user_id", current_user.id)
+            .eq("is_read", False)
+        )
             
-        return {"updated_count": len(unread_count.data) if unread_count.data else 0}
+        return {"updated_count": resp.count or 0}
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Error marking all notifications as read: {str(e)}")
 
@@ -159,7 +161,7 @@ def mark_all_read(
     status_code=status.HTTP_201_CREATED,
     summary="Schedule a notification to be sent later",
 )
-def schedule_notification(
+async def schedule_notification(
     type: str,
     user_id: str,
     triggered_by_id: str,
@@ -192,7 +194,7 @@ def schedule_notification(
         HTTPException: 400 if database operation fails
     """
     try:
-        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+        now = db_timestamp()
         send_time = send_at.strftime("%Y-%m-%dT%H:%M:%S.%f") if send_at else now
         
         notification_data = {
@@ -207,7 +209,7 @@ def schedule_notification(
             "status": NotificationStatus.PENDING
         }
         
-        resp = supabase.table("notifications").insert(notification_data).execute()
+        resp = await execute(supabase.table("notifications").insert(notification_data))
         
         if not resp.data:
             raise HTTPException(status_code=400, detail="Failed to schedule notification")
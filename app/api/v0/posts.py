@@ -1,78 +1,182 @@
-from datetime import datetime, timedelta
+import asyncio
+from collections import defaultdict
+from datetime import timedelta
 from typing import List, Optional
 
-from fastapi import (APIRouter, Depends, File, Form, HTTPException, UploadFile,
-                     status)
+from fastapi import (APIRouter, BackgroundTasks, Depends, File, Form,
+                     HTTPException, Query, Response, UploadFile, status)
+from postgrest.exceptions import APIError
+from pydantic import TypeAdapter
 
+from app.api.v0.challenges import invalidate_challenge
+from app.api.v0.users import invalidate_profile
+from app.core.cache import TTLCache
+from app.core.db import db_timestamp, execute, execute_all
 from app.core.deps import get_current_user, get_supabase
-from app.core.media import delete_file, upload_base64_image, upload_file
+from app.core.media import (delete_file, delete_files, upload_base64_image,
+                            upload_file)
 from app.core.moderation import moderate_post
+from app.core.pagination import NEXT_CURSOR_HEADER, apply_cursor, next_cursor
 from app.schemas.posts import PostCreate, PostOut, PostUpdate
 from app.schemas.base64 import Base64Images
 
 router = APIRouter(tags=["posts"])
 
+# Validates and serializes a whole page of posts in a single call
+post_list_adapter = TypeAdapter(list[PostOut])
+
+# Owner id of each post, keyed by post id. A post's owner never changes, so
+# the only invalidation needed is dropping the key when the post is deleted.
+post_owner_cache = TTLCache(maxsize=10_000, ttl=30)
+
+async def get_post_owner(post_id: str, supabase_client) -> str:
+    """
+    Look up who owns a post, going through the post owner cache.
+    
+    Args:
+        post_id (str): UUID of the post
+        supabase_client: Supabase client instance
+        
+    Returns:
+        str: user_id of the post's author
+        
+    Raises:
+        HTTPException: 404 if post not found
+    """
+    owner_id = post_owner_cache.get(post_id)
+    if owner_id is None:
+        try:
+            resp = await execute(supabase_client.table("posts").select("user_id").eq("id", post_id).single())
+        except APIError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        owner_id = resp.data["user_id"]
+        post_owner_cache.set(post_id, owner_id)
+    return owner_id
+
+async def _raise_missing_or_forbidden(post_id: str, user_id: str, supabase_client, action: str):
+    """Explains why an ownership-scoped write on a post matched no rows."""
+    owner_id = await get_post_owner(post_id, supabase_client)
+    if owner_id == user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not authorized to {action} this post")
+
 async def update_challenge_achievements(user_id: str, challenge_id: str, supabase_client):
     """
     Update challenge achievement stats for a user.
     """
     try:
-        participant_resp = supabase_client.table("challenge_participants").select("*").eq("user_id", user_id).eq("challenge_id", challenge_id).single().execute()
-        
-        if not participant_resp.data:
-            return
+        # Count, streak and success rate are recomputed in one statement;
+        # see scripts/v0/make_checkin_rpc.sql
+        await execute(supabase_client.rpc("record_challenge_checkin", {
+            "p_user_id": user_id,
+            "p_challenge_id": challenge_id
+        }))
 
-        participant = participant_resp.data
-        
-        new_count = participant.get("count", 0) + 1
-        
-        # Fetch the last two posts to check for consecutive days
-        posts_resp = supabase_client.table("posts") \
-            .select("created_at") \
-            .eq("user_id", user_id) \
-            .eq("challenge_id", challenge_id) \
-            .order("created_at", desc=True) \
-            .limit(2) \
-            .execute()
+    except Exception as e:
+        print(f"Failed to update challenge achievements for user {user_id}, challenge {challenge_id}: {e}")
+
+def _endorsement_info(post: dict, endorsements: list[dict]) -> dict:
+    """
+    Summarize a post's endorsement rows into its endorsement_info payload.
+    
+    Args:
+        post (dict): Post row
+        endorsements (list[dict]): post_endorsements rows for that post
         
-        new_streaks = participant.get("streaks", 0)
+    Returns:
+        dict: endorsement_info for PostOut
+    """
+    return {
+        "is_endorsed": post.get("is_endorsed", False),
+        "endorsement_count": sum(1 for e in endorsements if e["status"] == "endorsed"),
+        "pending_endorsement_count": sum(1 for e in endorsements if e["status"] == "pending"),
+        "endorser_ids": [e["endorser_id"] for e in endorsements if e["status"] == "endorsed"]
+    }
 
-        if posts_resp.data and len(posts_resp.data) > 1:
-            latest_post_date = datetime.fromisoformat(posts_resp.data[0]['created_at']).date()
-            previous_post_date = datetime.fromisoformat(posts_resp.data[1]['created_at']).date()
-            
-            if (latest_post_date - previous_post_date).days == 1:
-                # Consecutive days, increment streak
-                new_streaks += 1
-            elif (latest_post_date - previous_post_date).days > 1:
-                # Not consecutive, reset streak to 1
-                new_streaks = 1
-            # If days are 0, it means another post on the same day, so streak does not change.
-        else:
-            # This is the first post for the challenge
-            new_streaks = 1
+async def _insert_categories(post_id: str, categories: list[str], now: str, supabase_client):
+    """
+    Attach categories to a newly created post with a single bulk insert.
+    
+    The bulk insert is one statement, so either every category is stored or
+    none is. If it fails the post is deleted again, so a failed create never
+    leaves a post behind without its categories.
+    
+    Args:
+        post_id (str): UUID of the post
+        categories (list[str]): Category names; duplicates are dropped since
+            (post_id, category) is unique
+        now (str): Timestamp to record as created_at
+        supabase_client: Supabase client instance
+    """
+    try:
+        await execute(supabase_client.table("post_categories").insert([
+            {"post_id": post_id, "category": category, "created_at": now}
+            for category in dict.fromkeys(categories)
+        ]))
+    except Exception:
+        await execute(supabase_client.table("posts").delete().eq("id", post_id))
+        raise
 
-        joined_date = datetime.fromisoformat(participant["joined_at"]).date()
-        days_in_challenge = (datetime.now().date() - joined_date).days + 1
-        new_success_rate = (new_count / days_in_challenge) if days_in_challenge > 0 else new_count
+async def _upload_all(uploads: list, uploaded: list[str]) -> list[str]:
+    """
+    Run several media uploads concurrently.
+    
+    Args:
+        uploads (list): Upload coroutines, e.g. from upload_file
+        uploaded (list[str]): Receives the name of every upload that succeeded,
+            so the caller can clean them up if anything fails
+        
+    Returns:
+        list[str]: Uploaded filenames, in the order of `uploads`
+        
+    Raises:
+        Exception: The first upload error, once every upload has finished
+    """
+    results = await asyncio.gather(*uploads, return_exceptions=True)
+    uploaded.extend(result for result in results if not isinstance(result, BaseException))
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
 
-        update_data = {
-            "counts": new_count,
-            "streaks": new_streaks,
-            "success_rate": new_success_rate
-        }
-        supabase_client.table("challenge_participants").update(update_data).eq("user_id", user_id).eq("challenge_id", challenge_id).execute()
+def _delete_media(media_items) -> None:
+    """
+    Deletes the storage files behind a post's media_urls entries.
+    
+    Entries are [bucket, path] pairs; files are removed with one storage
+    request per bucket rather than one per file, and failures are logged
+    rather than raised so they never block the post write.
+    
+    Args:
+        media_items: media_urls entries (lists or tuples) to delete
+    """
+    paths_by_bucket = defaultdict(list)
+    for item in media_items or []:
+        if isinstance(item, (list, tuple)) and len(item) == 2:
+            paths_by_bucket[item[0]].append(item[1])
 
-    except Exception as e:
-        print(f"Failed to update challenge achievements for user {user_id}, challenge {challenge_id}: {e}")
+    for bucket, paths in paths_by_bucket.items():
+        try:
+            delete_files(bucket, paths)
+        except Exception as e:
+            print(f"Failed to delete media files {paths} from {bucket}: {str(e)}")
 
 @router.post("/", response_model=PostOut, status_code=status.HTTP_201_CREATED)
-async def create_post(payload: PostCreate, user=Depends(get_current_user), supabase=Depends(get_supabase)):
+async def create_post(
+    payload: PostCreate,
+    background_tasks: BackgroundTasks,
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase)
+):
     """
     Create a new post.
     
+    A check-in against a challenge updates the participant's stats after the
+    response is sent.
+    
     Args:
         payload (PostCreate): Post data to create
+        background_tasks: Records the challenge check-in after the response
         user: Current authenticated user from token
         
     Returns:
@@ -85,7 +189,7 @@ async def create_post(payload: PostCreate, user=Depends(get_current_user), supab
     if payload.content:
         await moderate_post(payload.content, raise_exception=True)
         
-    now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+    now = db_timestamp()
     
     post_data = {
         "user_id": user.id,
@@ -103,24 +207,26 @@ async def create_post(payload: PostCreate, user=Depends(get_current_user), supab
         post_data["challenge_id"] = payload.challenge_id
     
     try:
-        resp = supabase.table("posts").insert(post_data).execute()
+        resp = await execute(supabase.table("posts").insert(post_data))
         
         if not resp.data:
             raise HTTPException(status_code=400, detail="Failed to create post")
         
         post = resp.data[0]
+        # The author's posts_count changed
+        invalidate_profile(user.id)
         
-        if post.get("challenge_id"):
-            await update_challenge_achievements(user.id, post["challenge_id"], supabase)
-        
+        # Categories go first: if they fail the post is rolled back before
+        # the check-in is recorded against the challenge
         if hasattr(payload, "categories") and payload.categories:
-            for category in payload.categories:
-                category_data = {
-                    "post_id": post["id"],
-                    "category": category,
-                    "created_at": now
-                }
-                supabase.table("post_categories").insert(category_data).execute()
+            await _insert_categories(post["id"], payload.categories, now, supabase)
+        
+        if post.get("challenge_id"):
+            # Participant stats are not part of the response and failures are
+            # only logged, so the client does not wait on the RPC
+            background_tasks.add_task(update_challenge_achievements, user.id, post["challenge_id"], supabase)
+            # The new post bumped the challenge's posts_count
+            invalidate_challenge(post["challenge_id"])
         
         post["endorsement_info"] = {
             "is_endorsed": False,
@@ -137,6 +243,7 @@ async def create_post(payload: PostCreate, user=Depends(get_current_user), supab
 
 @router.post("/with-media", response_model=PostOut, status_code=status.HTTP_201_CREATED)
 async def create_post_with_media(
+    background_tasks: BackgroundTasks,
     content: str = Form(...),
     location: Optional[str] = Form(None),
     is_private: bool = Form(False),
@@ -149,7 +256,10 @@ async def create_post_with_media(
     """
     Create a new post with media uploads.
     
+    As with create_post, a challenge check-in is recorded after the response.
+    
     Args:
+        background_tasks: Records the challenge check-in after the response
         content: Text content of the post
         location: Optional location string
         is_private: Whether the post is private
@@ -168,17 +278,18 @@ async def create_post_with_media(
     #if content:
     #    await moderate_post(content, raise_exception=True)
     
-    now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+    now = db_timestamp()
     processed_media_items = []
     
     uploaded_filenames_for_cleanup = []
 
     try:
         if files:
-            for file_upload_obj in files:
-                filename = await upload_file("media_urls", file_upload_obj, user.id)
-                processed_media_items.append(["media_urls", filename])
-                uploaded_filenames_for_cleanup.append(filename)
+            filenames = await _upload_all(
+                [upload_file("media_urls", file_upload_obj, user.id) for file_upload_obj in files],
+                uploaded_filenames_for_cleanup,
+            )
+            processed_media_items = [["media_urls", filename] for filename in filenames]
         
         post_data = {
             "user_id": user.id,
@@ -195,7 +306,7 @@ async def create_post_with_media(
         if challenge_id and challenge_id != "string" and challenge_id.strip():
             post_data["challenge_id"] = challenge_id
         
-        resp = supabase.table("posts").insert(post_data).execute()
+        resp = await execute(supabase.table("posts").insert(post_data))
         
         if not resp.data:
             for fname in uploaded_filenames_for_cleanup:
@@ -206,18 +317,20 @@ async def create_post_with_media(
             raise HTTPException(status_code=400, detail="Failed to create post")
         
         post = resp.data[0]
+        # The author's posts_count changed
+        invalidate_profile(user.id)
         
-        if post.get("challenge_id"):
-            await update_challenge_achievements(user.id, post["challenge_id"], supabase)
-        
+        # Categories go first: if they fail the post is rolled back before
+        # the check-in is recorded against the challenge
         if categories:
-            for category in categories:
-                category_data = {
-                    "post_id": post["id"],
-                    "category": category,
-                    "created_at": now
-                }
-                supabase.table("post_categories").insert(category_data).execute()
+            await _insert_categories(post["id"], categories, now, supabase)
+        
+        if post.get("challenge_id"):
+            # Participant stats are not part of the response and failures are
+            # only logged, so the client does not wait on the RPC
+            background_tasks.add_task(update_challenge_achievements, user.id, post["challenge_id"], supabase)
+            # The new post bumped the challenge's posts_count
+            invalidate_challenge(post["challenge_id"])
         
         post["endorsement_info"] = {
             "is_endorsed": False,
@@ -264,10 +377,11 @@ async def upload_post_media_base64(
     uploaded_filenames_for_cleanup = []
 
     try:
-        for image_data in payload.base64_images:
-            filename = await upload_base64_image("post_media", image_data, user.id, "image/jpg")
-            processed_media_items.append(["post_media", filename])
-            uploaded_filenames_for_cleanup.append(filename)
+        filenames = await _upload_all(
+            [upload_base64_image("post_media", image_data, user.id, "image/jpg") for image_data in payload.base64_images],
+            uploaded_filenames_for_cleanup,
+        )
+        processed_media_items = [["post_media", filename] for filename in filenames]
 
         return processed_media_items
 
@@ -301,10 +415,11 @@ async def upload_post_media(
     processed_media_items = []
     uploaded_filenames_for_cleanup = []
     try:
-        for file_upload_obj in files:
-            filename = await upload_file("media_urls", file_upload_obj, user.id)
-            processed_media_items.append(["media_urls", filename])
-            uploaded_filenames_for_cleanup.append(filename)
+        filenames = await _upload_all(
+            [upload_file("media_urls", file_upload_obj, user.id) for file_upload_obj in files],
+            uploaded_filenames_for_cleanup,
+        )
+        processed_media_items = [["media_urls", filename] for filename in filenames]
         return processed_media_items
     except Exception as e:
         for fname in uploaded_filenames_for_cleanup:
@@ -314,20 +429,33 @@ async def upload_post_media(
                 pass
         raise HTTPException(status_code=400, detail=f"Failed to upload media: {str(e)}")
 
-@router.get("/", response_model=list[PostOut])
-async def list_posts(supabase=Depends(get_supabase), challenge_id: str | None = None, user_id: str | None = None):
+@router.get("/", response_model=None, responses={200: {"model": list[PostOut]}})
+async def list_posts(
+    supabase=Depends(get_supabase),
+    challenge_id: str | None = None,
+    user_id: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
     """
-    List all posts with optional filtering.
+    List posts, newest first, with optional filtering.
+    
+    Pages are keyset-paginated: when more posts may follow, the response
+    carries an X-Next-Cursor header to pass back as `cursor`. The page is
+    validated and encoded to JSON bytes in one pydantic-core pass.
     
     Args:
         challenge_id: Optional challenge ID to filter posts by
         user_id: Optional user ID to filter posts by
+        limit (int): Maximum number of posts to return
+        cursor (str, optional): Cursor from the previous page
         
     Returns:
         list[PostOut]: List of post objects
     """
-    # Start building the query
-    query = supabase.table("posts").select("*")
+    # Start building the query; each post's endorsements are embedded so the
+    # whole page, endorsement summaries included, comes back in one request
+    query = supabase.table("posts").select("*, post_endorsements(status, endorser_id)")
     
     # Apply filters if provided
     if challenge_id:
@@ -337,27 +465,20 @@ async def list_posts(supabase=Depends(get_supabase), challenge_id: str | None =
         query = query.eq("user_id", user_id)
     
     # Execute the query
-    resp = query.execute()
+    resp = await execute(apply_cursor(query, cursor, limit))
     posts = resp.data
     
     for post in posts:
-        endorsements = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("post_id", post["id"])\
-            .execute()
-                     
-        endorsed_count = sum(1 for e in endorsements.data if e["status"] == "endorsed")
-        pending_count = sum(1 for e in endorsements.data if e["status"] == "pending")
-        endorser_ids = [e["endorser_id"] for e in endorsements.data if e["status"] == "endorsed"]
-                 
-        post["endorsement_info"] = {
-            "is_endorsed": post.get("is_endorsed", False),
-            "endorsement_count": endorsed_count,
-            "pending_endorsement_count": pending_count,
-            "endorser_ids": endorser_ids
-        }
-         
-    return posts
+        post["endorsement_info"] = _endorsement_info(post, post.pop("post_endorsements") or [])
+    
+    response = Response(
+        content=post_list_adapter.dump_json(post_list_adapter.validate_python(posts)),
+        media_type="application/json",
+    )
+    cursor_token = next_cursor(posts, limit)
+    if cursor_token:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_token
+    return response
 
 @router.get("/{post_id}", response_model=PostOut)
 async def get_post(post_id: str, supabase=Depends(get_supabase)):
@@ -374,37 +495,38 @@ async def get_post(post_id: str, supabase=Depends(get_supabase)):
         HTTPException: 404 if post not found
     """
     try:
-        resp = supabase.table("posts").select("*").eq("id", post_id).single().execute()
+        resp = await execute(
+            supabase.table("posts")
+            .select("*, post_endorsements(status, endorser_id)")
+            .eq("id", post_id)
+            .single()
+        )
         post = resp.data
-        
-        endorsements = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("post_id", post_id)\
-            .execute()
             
-        endorsed_count = sum(1 for e in endorsements.data if e["status"] == "endorsed")
-        pending_count = sum(1 for e in endorsements.data if e["status"] == "pending")
-        endorser_ids = [e["endorser_id"] for e in endorsements.data if e["status"] == "endorsed"]
-        
-        post["endorsement_info"] = {
-            "is_endorsed": post.get("is_endorsed", False),
-            "endorsement_count": endorsed_count,
-            "pending_endorsement_count": pending_count,
-            "endorser_ids": endorser_ids
-        }
+        post["endorsement_info"] = _endorsement_info(post, post.pop("post_endorsements") or [])
         
         return post
     except Exception as e:
         raise HTTPException(status_code=404, detail="Post not found")
 
 @router.put("/{post_id}", response_model=PostOut)
-async def update_post(post_id: str, payload: PostUpdate, user=Depends(get_current_user), supabase=Depends(get_supabase)):
+async def update_post(
+    post_id: str,
+    payload: PostUpdate,
+    background_tasks: BackgroundTasks,
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase)
+):
     """
     Update a post.
     
+    Media files dropped from the post are removed from storage after the
+    response is sent.
+    
     Args:
         post_id (str): UUID of the post to update
         payload (PostUpdate): Updated post data
+        background_tasks: Runs the storage cleanup after the response
         user: Current authenticated user from token
         
     Returns:
@@ -416,58 +538,48 @@ async def update_post(post_id: str, payload: PostUpdate, user=Depends(get_curren
         HTTPException: 400 if content violates moderation policy
     """
     try:
-        existing_post_resp = supabase.table("posts").select("user_id, media_urls").eq("id", post_id).single().execute()
-        
-        if not existing_post_resp.data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-
-        if existing_post_resp.data["user_id"] != user.id:
+        # 404/403 come before moderation, so only the owner's edits reach the
+        # Moderation API; the owner lookup is usually a cache hit
+        if await get_post_owner(post_id, supabase) != user.id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this post")
         
-        current_media_urls = existing_post_resp.data.get("media_urls") or []
-        
         if payload.content is not None:
             await moderate_post(payload.content, raise_exception=True)
             
         update_data = payload.model_dump(exclude_unset=True)
-        update_data["updated_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+        update_data["updated_at"] = db_timestamp()
         update_data["edited"] = True
         
+        current_media_urls = None
         if "media_urls" in update_data:
+            # Replacing media needs the old list to know which files to remove
+            existing_post_resp = await execute(
+                supabase.table("posts").select("media_urls").eq("id", post_id).eq("user_id", user.id).limit(1)
+            )
+            if not existing_post_resp.data:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+            current_media_urls = existing_post_resp.data[0].get("media_urls") or []
+        
+        # The update stays scoped to the caller's own post, which also covers
+        # a post deleted since the owner check; endorsements are not touched
+        # by it and load alongside
+        updated_post, endorsements = await execute_all(
+            supabase.table("posts").update(update_data).eq("id", post_id).eq("user_id", user.id),
+            supabase.table("post_endorsements").select("status, endorser_id").eq("post_id", post_id),
+        )
+        if not updated_post.data:
+            await _raise_missing_or_forbidden(post_id, user.id, supabase, "update")
+        post = updated_post.data[0]
+        
+        if current_media_urls is not None:
             new_media_urls = update_data["media_urls"]
             
             new_media_urls_set = set(tuple(item) for item in new_media_urls) if new_media_urls else set()
             current_media_urls_set = set(tuple(item) for item in current_media_urls)
 
-            files_to_delete = current_media_urls_set - new_media_urls_set
-            
-            for item_to_delete in files_to_delete:
-                if isinstance(item_to_delete, tuple) and len(item_to_delete) == 2:
-                    try:
-                        delete_file(bucket_name=item_to_delete[0], file_path=item_to_delete[1])
-                    except Exception as e_del:
-                        print(f"Failed to delete old media {item_to_delete}: {e_del}")
-        
-        supabase.table("posts").update(update_data).eq("id", post_id).execute()
-        
-        updated_post = supabase.table("posts").select("*").eq("id", post_id).single().execute()
-        post = updated_post.data
-        
-        endorsements = supabase.table("post_endorsements")\
-            .select("*")\
-            .eq("post_id", post_id)\
-            .execute()
+            background_tasks.add_task(_delete_media, current_media_urls_set - new_media_urls_set)
             
-        endorsed_count = sum(1 for e in endorsements.data if e["status"] == "endorsed")
-        pending_count = sum(1 for e in endorsements.data if e["status"] == "pending")
-        endorser_ids = [e["endorser_id"] for e in endorsements.data if e["status"] == "endorsed"]
-        
-        post["endorsement_info"] = {
-            "is_endorsed": post.get("is_endorsed", False),
-            "endorsement_count": endorsed_count,
-            "pending_endorsement_count": pending_count,
-            "endorser_ids": endorser_ids
-        }
+        post["endorsement_info"] = _endorsement_info(post, endorsements.data or [])
         
         return post
     except HTTPException:
@@ -476,12 +588,21 @@ async def update_post(post_id: str, payload: PostUpdate, user=Depends(get_curren
         raise HTTPException(status_code=404, detail="Post not found")
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_post(post_id: str, user=Depends(get_current_user), supabase=Depends(get_supabase)):
+async def delete_post(
+    post_id: str,
+    background_tasks: BackgroundTasks,
+    user=Depends(get_current_user),
+    supabase=Depends(get_supabase)
+):
     """
     Delete a post and its associated media files.
     
+    The media files and endorsement selfies are removed from storage after
+    the response is sent.
+    
     Args:
         post_id (str): UUID of the post to delete
+        background_tasks: Runs the storage cleanup after the response
         user: Current authenticated user from token
         
     Returns:
@@ -492,36 +613,31 @@ async def delete_post(post_id: str, user=Depends(get_current_user), supabase=Dep
         HTTPException: 404 if post not found
     """
     try:
-        post = supabase.table("posts").select("*").eq("id", post_id).single().execute()
-        
-        if not post.data:
-            raise HTTPException(status_code=404, detail="Post not found")
-            
-        if post.data["user_id"] != user.id:
-            raise HTTPException(status_code=403, detail="Not authorized to delete this post")
-        
-        if post.data.get("media_urls") and isinstance(post.data["media_urls"], list):
-            for media_item in post.data["media_urls"]:
-                if isinstance(media_item, list) and len(media_item) == 2:
-                    try:
-                        delete_file(bucket_name=media_item[0], file_path=media_item[1])
-                    except Exception as e:
-                        print(f"Failed to delete media file {media_item}: {str(e)}")
-        
-        endorsements = supabase.table("post_endorsements").select("*").eq("post_id", post_id).execute()
-        if endorsements.data:
-            for endorsement in endorsements.data:
-                if endorsement.get("selfie_url"):
-                    try:
-                        delete_file("endorsements", endorsement["selfie_url"])
-                    except Exception as e:
-                        print(f"Failed to delete endorsement selfie {endorsement['selfie_url']}: {str(e)}")
-        
-        supabase.table("post_categories").delete().eq("post_id", post_id).execute()
-        
-        supabase.table("post_endorsements").delete().eq("post_id", post_id).execute()
-            
-        supabase.table("posts").delete().eq("id", post_id).execute()
+        # Endorsements cascade with the post, so their selfies are read first
+        endorsements = await execute(supabase.table("post_endorsements").select("selfie_url").eq("post_id", post_id))
+        
+        # The delete is scoped to the caller's own post, so it is its own
+        # ownership check and hands back the row whose files need removing.
+        # Categories, endorsements, comments, likes, saves and notifications
+        # reference posts with ON DELETE CASCADE, so the database removes them
+        # in the same statement
+        deleted = await execute(
+            supabase.table("posts").delete().eq("id", post_id).eq("user_id", user.id)
+        )
+        if not deleted.data:
+            await _raise_missing_or_forbidden(post_id, user.id, supabase, "delete")
+        post = deleted.data[0]
+        post_owner_cache.pop(post_id)
+        invalidate_profile(user.id)
+        if post.get("challenge_id"):
+            invalidate_challenge(post["challenge_id"])
+        
+        # The row is gone, so leftover files are only a storage cost: remove
+        # them without holding up the response
+        media_items = [["endorsements", endorsement["selfie_url"]] for endorsement in endorsements.data or [] if endorsement.get("selfie_url")]
+        if isinstance(post.get("media_urls"), list):
+            media_items.extend(post["media_urls"])
+        background_tasks.add_task(_delete_media, media_items)
         return None
     except HTTPException:
         raise
@@ -1,8 +1,8 @@
-from datetime import datetime
-
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from postgrest.exceptions import APIError
 
 from app.core.config import supabase
+from app.core.db import db_timestamp, execute
 from app.core.deps import get_current_user
 from app.schemas.posts import PostOut, SavedPostCreate
 
@@ -24,37 +24,31 @@ async def save_post(payload: SavedPostCreate, user=Depends(get_current_user)):
         HTTPException: 400 if post cannot be saved
         HTTPException: 404 if post not found
     """
-    # Check if post exists
-    try:
-        post_exists = supabase.table("posts").select("id").eq("id", payload.post_id).single().execute()
-        if not post_exists.data:
-            raise HTTPException(status_code=404, detail="Post not found")
-    except Exception as e:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Check if already saved
-    already_saved = supabase.table("user_saved_posts")\
-        .select("*")\
-        .eq("user_id", user.id)\
-        .eq("post_id", payload.post_id)\
-        .execute()
-        
-    if already_saved.data:
-        return {"message": "Post already saved"}
-    
-    # Save the post
-    now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+    now = db_timestamp()
     saved_post_data = {
         "user_id": user.id,
         "post_id": payload.post_id,
         "created_at": now
     }
     
+    # The (user_id, post_id) primary key makes the insert its own duplicate
+    # check and the posts FK its own existence check
     try:
-        supabase.table("user_saved_posts").insert(saved_post_data).execute()
-        return {"message": "Post saved successfully"}
+        resp = await execute(
+            supabase.table("user_saved_posts")
+            .upsert(saved_post_data, on_conflict="user_id,post_id", ignore_duplicates=True)
+        )
+    except APIError as e:
+        # 23503: no such post (FK violation), 22P02: malformed post id
+        if e.code in ("23503", "22P02"):
+            raise HTTPException(status_code=404, detail="Post not found")
+        raise HTTPException(status_code=400, detail=f"Error saving post: {e.message}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error saving post: {str(e)}")
+    
+    if not resp.data:
+        return {"message": "Post already saved"}
+    return {"message": "Post saved successfully"}
 
 @router.get("/{post_id}/check", response_model=dict)
 async def check_saved_post(post_id: str, user=Depends(get_current_user)):
@@ -69,17 +63,19 @@ async def check_saved_post(post_id: str, user=Depends(get_current_user)):
         dict: Boolean "is_saved" indicating if post is saved
     """
     try:
-        saved_post = supabase.table("user_saved_posts")\
-            .select("*")\
-            .eq("user_id", user.id)\
-            .eq("post_id", post_id)\
-            .execute()
+        # Head-only count on the (user_id, post_id) key: no row body comes back
+        saved_post = await execute(
+            supabase.table("user_saved_posts")
+            .select("post_id", count="exact", head=True)
+            .eq("user_id", user.id)
+            .eq("post_id", post_id)
+        )
             
-        return {"is_saved": len(saved_post.data) > 0}
+        return {"is_saved": bool(saved_post.count)}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error checking saved status: {str(e)}")
 
-@router.delete("/{post_id}", status_code=status.HTTP_200_OK)
+@router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def unsave_post(post_id: str, user=Depends(get_current_user)):
     """
     Unsave (remove) a saved post for the current user.
@@ -89,65 +85,59 @@ async def unsave_post(post_id: str, user=Depends(get_current_user)):
         user: Current authenticated user from token
         
     Returns:
-        dict: Success message
+        Response: 204 No Content on success
         
     Raises:
         HTTPException: 404 if saved post not found
     """
     try:
-        # Check if post is saved by user
-        saved_post = supabase.table("user_saved_posts")\
-            .select("*")\
-            .eq("user_id", user.id)\
-            .eq("post_id", post_id)\
-            .execute()
+        # Delete the saved post; the deleted row comes back in the response,
+        # so an empty result means it was never saved
+        removed = await execute(
+            supabase.table("user_saved_posts")
+            .delete()
+            .eq("user_id", user.id)
+            .eq("post_id", post_id)
+        )
             
-        if not saved_post.data:
+        if not removed.data:
             raise HTTPException(status_code=404, detail="Saved post not found")
             
-        # Delete the saved post
-        supabase.table("user_saved_posts")\
-            .delete()\
-            .eq("user_id", user.id)\
-            .eq("post_id", post_id)\
-            .execute()
-            
-        return {"message": "Post unsaved successfully"}
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         raise HTTPException(status_code=400, detail=f"Error unsaving post: {str(e)}")
 
 @router.get("/", response_model=list[PostOut])
-async def get_saved_posts(user=Depends(get_current_user)):
+async def get_saved_posts(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    user=Depends(get_current_user),
+):
     """
-    Get all posts saved by the current user.
+    Get posts saved by the current user, most recently saved first.
     
     Args:
+        limit (int): Maximum number of posts to return
+        offset (int): Number of saved posts to skip
         user: Current authenticated user from token
         
     Returns:
         list[PostOut]: List of saved post objects
     """
     try:
-        # Get all saved post IDs for the user
-        saved_posts = supabase.table("user_saved_posts")\
-            .select("post_id")\
-            .eq("user_id", user.id)\
-            .execute()
-            
-        if not saved_posts.data:
-            return []
-            
-        # Extract post IDs
-        post_ids = [saved_post["post_id"] for saved_post in saved_posts.data]
-        
-        # Get the full post data for each saved post
-        posts = supabase.table("posts")\
-            .select("*")\
-            .in_("id", post_ids)\
-            .execute()
+        # Embed the saved posts in the user's saved rows: one request instead
+        # of fetching the ids and then the posts. Pages walk
+        # idx_user_saved_posts_user_created instead of loading every save.
+        saved_posts = await execute(
+            supabase.table("user_saved_posts")
+            .select("post:posts(*)")
+            .eq("user_id", user.id)
+            .order("created_at", desc=True)
+            .range(offset, offset + limit - 1)
+        )
             
-        return posts.data
+        return [saved["post"] for saved in saved_posts.data if saved.get("post")]
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error retrieving saved posts: {str(e)}") 
\ No newline at end of file
@@ -1,19 +1,57 @@
+import asyncio
 import logging
-from datetime import datetime
 from typing import List, Optional
 
-from fastapi import (APIRouter, Cookie, Depends, File, Form, Header,
-                     HTTPException, UploadFile, status, Body)
+from fastapi import (APIRouter, BackgroundTasks, Cookie, Depends, File, Form,
+                     Header, HTTPException, UploadFile, status, Body)
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.core.cache import SingleFlight, TTLCache
 from app.core.config import supabase
-from app.core.deps import get_current_user
+from app.core.db import db_timestamp, execute
+from app.core.deps import get_current_user, invalidate_user
 from app.core.media import delete_file, upload_base64_image, upload_file
-from app.schemas.users import UserOut, UserUpdate
+from app.schemas.users import UserOut, UserUpdate, UserWithStats
 
 router = APIRouter(tags=["users"])
 logger = logging.getLogger(__name__)
 
+# Profiles with their counts, keyed by username, and the username last cached
+# for each user id so writes (which know ids) can drop the entry. Profile,
+# follow and post writes must call invalidate_profile.
+profile_cache = TTLCache(maxsize=10_000, ttl=60)
+profile_usernames = TTLCache(maxsize=10_000, ttl=60)
+# Concurrent misses on the same username share one RPC
+profile_loads = SingleFlight()
+
+
+def invalidate_profile(*user_ids: str):
+    """Drops the cached profiles of the given users."""
+    for user_id in user_ids:
+        username = profile_usernames.get(user_id)
+        if username is not None:
+            profile_cache.pop(username)
+            profile_usernames.pop(user_id)
+
+# Columns returned after a profile write. UPDATE hands back the whole row,
+# which also holds private columns such as fcm_token, so only these are kept.
+PROFILE_COLUMNS = ("id", "username", "full_name", "avatar_url", "email", "bio", "updated_at")
+
+
+def _profile(row: dict) -> dict:
+    """Keeps only the PROFILE_COLUMNS of a users row."""
+    return {column: row.get(column) for column in PROFILE_COLUMNS}
+
+
+def _delete_avatar(avatar_url) -> None:
+    """Removes a replaced [bucket, filename] avatar from storage; failures are only logged."""
+    if avatar_url and isinstance(avatar_url, list) and len(avatar_url) == 2:
+        try:
+            delete_file(avatar_url[0], avatar_url[1])
+        except Exception as e:
+            logger.warning(f"Failed to delete old avatar {avatar_url}: {str(e)}")
+
 @router.get("/search", response_model=List[UserOut])
 async def search_users(query: str):
     """
@@ -24,7 +62,7 @@ async def search_users(query: str):
 
     try:
         # Use RPC to call the search_users function in the database for ranked results
-        resp = supabase.rpc("search_users", {"p_search_term": query}).execute()
+        resp = await execute(supabase.rpc("search_users", {"p_search_term": query}))
         return resp.data
     except Exception as e:
         logger.error(f"Error searching users via RPC: {e}")
@@ -41,7 +79,7 @@ async def read_current_user(user=Depends(get_current_user)):
     Returns:
         UserOut: User profile data
     """
-    return UserOut(**user.__dict__)
+    return user
 
 @router.get("/{user_id}", response_model=UserOut)
 async def read_user(user_id: str):
@@ -58,34 +96,48 @@ async def read_user(user_id: str):
         HTTPException: 404 if user not found
     """
     try:
-        resp = supabase.table("users")\
-            .select("id,username,full_name,avatar_url,email")\
-            .eq("id", user_id).single().execute()
+        resp = await execute(
+            supabase.table("users")
+            .select("id,username,full_name,avatar_url,email")
+            .eq("id", user_id).single()
+        )
         return resp.data
     except Exception as e:
         raise HTTPException(status_code=404, detail="User not found")
 
-@router.get("/by-username/{username}", response_model=UserOut)
+@router.get("/by-username/{username}", response_model=UserWithStats)
 async def read_user_by_username(username: str):
     """
-    Get details of a specific user by username.
+    Get details of a specific user by username, with their post, follower
+    and following counts, going through the profile cache.
     
     Args:
         username (str): Username of the user to retrieve
         
     Returns:
-        UserOut: User profile data
+        UserWithStats: User profile data and counts
         
     Raises:
         HTTPException: 404 if user not found
     """
-    try:
-        resp = supabase.table("users")\
-            .select("id,username,full_name,avatar_url,email")\
-                .eq("username", username).single().execute()
-        return resp.data
-    except Exception as e:
-        raise HTTPException(status_code=404, detail="User not found")
+    profile = profile_cache.get(username)
+    if profile is not None:
+        return profile
+
+    async def load() -> dict:
+        try:
+            # Profile and all three counts in one statement;
+            # see scripts/v0/make_user_stats_rpc.sql
+            resp = await execute(supabase.rpc("get_user_with_stats", {"p_username": username}))
+        except Exception as e:
+            raise HTTPException(status_code=404, detail="User not found")
+        if not resp.data:
+            raise HTTPException(status_code=404, detail="User not found")
+        profile_cache.set(username, resp.data[0])
+        profile_usernames.set(resp.data[0]["id"], username)
+        return resp.data[0]
+
+    return await profile_loads.do(username, load)
 
 @router.put("/me", response_model=UserOut)
 async def update_user(payload: UserUpdate, user=Depends(get_current_user)):
@@ -100,12 +152,12 @@ async def update_user(payload: UserUpdate, user=Depends(get_current_user)):
         UserOut: Updated user profile
     """
     data = payload.model_dump(exclude_unset=True)
-    data["updated_at"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
-    supabase.table("users").update(data).eq("id", user.id).execute()
-    return supabase.table("users")\
-        .select("id,username,full_name,avatar_url,email")\
-        .eq("id", user.id)\
-        .single().execute().data
+    data["updated_at"] = db_timestamp()
+    # The updated row comes back with the write, so no second read is needed
+    resp = await execute(supabase.table("users").update(data).eq("id", user.id))
+    invalidate_user(user.id)
+    invalidate_profile(user.id)
+    return _profile(resp.data[0])
 
 @router.put("/me/fcm-token", status_code=status.HTTP_204_NO_CONTENT)
 async def update_fcm_token(
@@ -116,13 +168,15 @@ async def update_fcm_token(
     Update the FCM token for the currently authenticated user.
     """
     try:
-        supabase.table("users").update({"fcm_token": fcm_token}).eq("id", user.id).execute()
+        await execute(supabase.table("users").update({"fcm_token": fcm_token}).eq("id", user.id))
+        invalidate_user(user.id)
     except Exception as e:
         logger.error(f"Failed to update FCM token for user {user.id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to update FCM token")
 
 @router.post("/me/avatar", response_model=UserOut)
 async def upload_avatar(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user=Depends(get_current_user)
 ):
@@ -130,39 +184,36 @@ async def upload_avatar(
     Upload a new avatar image for the current user.
     
     Args:
+        background_tasks: Removes the replaced avatar after the response
         file: The image file to upload
         user: Current user from token validation dependency
         
     Returns:
         UserOut: Updated user profile with new avatar URL
     """
-    # Check if user has an existing avatar to delete
-    if user.avatar_url and isinstance(user.avatar_url, list) and len(user.avatar_url) == 2:
-        try:
-            # user.avatar_url is [bucket, filename], bucket should be "avatar_url"
-            delete_file(bucket_name=user.avatar_url[0], file_path=user.avatar_url[1])
-        except Exception as e:
-            logger.warning(f"Failed to delete old avatar for user {user.id}: {str(e)}")
-    
     # Upload the new avatar to "avatar_url" bucket
     uploaded_filename = await upload_file("avatar_url", file, user.id)
     
     # Update the user's avatar_url in the database
-    updated_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+    updated_at = db_timestamp()
     new_avatar_data = ["avatar_url", uploaded_filename]
-    supabase.table("users").update({
+    resp = await execute(supabase.table("users").update({
         "avatar_url": new_avatar_data,
         "updated_at": updated_at
-    }).eq("id", user.id).execute()
+    }).eq("id", user.id))
+    invalidate_user(user.id)
+    invalidate_profile(user.id)
+    
+    # The old avatar (user.avatar_url is [bucket, filename]) is only removed
+    # once the new one is stored, and off the response path
+    background_tasks.add_task(_delete_avatar, user.avatar_url)
     
     # Return the updated user data
-    return supabase.table("users")\
-        .select("id,username,full_name,avatar_url,email,bio,updated_at")\
-        .eq("id", user.id)\
-        .single().execute().data
+    return _profile(resp.data[0])
 
 @router.post("/me/avatar/base64", response_model=UserOut)
 async def upload_avatar_base64(
+    background_tasks: BackgroundTasks,
     base64_image: str = Form(...),
     user=Depends(get_current_user)
 ):
@@ -170,35 +221,32 @@ async def upload_avatar_base64(
     Upload a new avatar image for the current user using base64 encoded data.
     
     Args:
+        background_tasks: Removes the replaced avatar after the response
         base64_image: Base64 encoded image data
         user: Current user from token validation dependency
         
     Returns:
         UserOut: Updated user profile with new avatar URL
     """
-    # Check if user has an existing avatar to delete
-    if user.avatar_url and isinstance(user.avatar_url, list) and len(user.avatar_url) == 2:
-        try:
-            delete_file(bucket_name=user.avatar_url[0], file_path=user.avatar_url[1])
-        except Exception as e:
-            logger.warning(f"Failed to delete old avatar for user {user.id}: {str(e)}")
-    
     # Upload the new avatar to "avatar_url" bucket
     uploaded_filename = await upload_base64_image("avatar_url", base64_image, user.id)
     
     # Update the user's avatar_url in the database
-    updated_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
+    updated_at = db_timestamp()
     new_avatar_data = ["avatar_url", uploaded_filename]
-    supabase.table("users").update({
+    resp = await execute(supabase.table("users").update({
         "avatar_url": new_avatar_data,
         "updated_at": updated_at
-    }).eq("id", user.id).execute()
+    }).eq("id", user.id))
+    invalidate_user(user.id)
+    invalidate_profile(user.id)
+    
+    # The old avatar (user.avatar_url is [bucket, filename]) is only removed
+    # once the new one is stored, and off the response path
+    background_tasks.add_task(_delete_avatar, user.avatar_url)
     
     # Return the updated user data
-    return supabase.table("users")\
-        .select("id,username,full_name,avatar_url,email,bio,updated_at")\
-        .eq("id", user.id)\
-        .single().execute().data
+    return _profile(resp.data[0])
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(user_id: str, current_user=Depends(get_current_user)):
@@ -231,28 +279,23 @@ async def delete_user(user_id: str, current_user=Depends(get_current_user)):
                 detail="Not authorized to delete other users"
             )
             
-        # Check if user exists in public.users table
-        user_db_data = supabase.table("users").select("id,avatar_url").eq("id", user_id).single().execute()
+        # Delete from public.users first; the deleted row comes back with the
+        # avatar to remove, and an empty result means there was no such user
+        logger.info(f"Deleting user {user_id} from public.users table")
+        deleted = await execute(supabase.table("users").delete().eq("id", user_id))
+        invalidate_user(user_id)
+        invalidate_profile(user_id)
         
-        if not user_db_data.data:
+        if not deleted.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
-        # Delete avatar if it exists
-        db_avatar_url = user_db_data.data.get("avatar_url")
-        if db_avatar_url and isinstance(db_avatar_url, list) and len(db_avatar_url) == 2:
-            try:
-                # db_avatar_url is [bucket, filename]
-                delete_file(bucket_name=db_avatar_url[0], file_path=db_avatar_url[1])
-            except Exception as e:
-                logger.warning(f"Failed to delete avatar for user {user_id}: {str(e)}")
-
-        # Delete from public.users first
-        logger.info(f"Deleting user {user_id} from public.users table")
-        supabase.table("users").delete().eq("id", user_id).execute()
-        
-        # Delete from auth.users using the admin API
+        # The avatar file and auth.users (via the admin API) are independent,
+        # so both are removed at once
         logger.info(f"Deleting user {user_id} from auth.users table")
-        supabase.auth.admin.delete_user(user_id)
+        await asyncio.gather(
+            run_in_threadpool(_delete_avatar, deleted.data[0].get("avatar_url")),
+            run_in_threadpool(supabase.auth.admin.delete_user, user_id),
+        )
         
         return None
     except HTTPException:
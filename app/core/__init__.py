@@ -1,8 +1,12 @@
+from app.core.cache import SingleFlight, TTLCache
 from app.core.config import settings, supabase
-from app.core.deps import get_current_user, get_supabase
-from app.core.media import delete_file, upload_base64_image, upload_file
+from app.core.db import db_timestamp, execute, execute_all
+from app.core.deps import get_current_user, get_supabase, invalidate_user
+from app.core.media import (delete_file, delete_files, upload_base64_image,
+                            upload_file)
 from app.core.moderation import (moderate_challenge, moderate_content,
                                  moderate_post)
+from app.core.pagination import apply_cursor, decode_cursor, encode_cursor, next_cursor
 from app.core.security import (create_access_token, decode_access_token,
                                hash_password, verify_password)
 
@@ -14,10 +18,19 @@ __all__ = [
     "verify_password", "hash_password", "create_access_token", "decode_access_token",
     
     # Dependencies
-    "get_current_user", "get_supabase",
+    "get_current_user", "get_supabase", "invalidate_user",
+    
+    # Database
+    "db_timestamp", "execute", "execute_all",
+    
+    # Cache
+    "SingleFlight", "TTLCache",
+    
+    # Pagination
+    "apply_cursor", "decode_cursor", "encode_cursor", "next_cursor",
     
     # Media
-    "delete_file", "upload_base64_image", "upload_file",
+    "delete_file", "delete_files", "upload_base64_image", "upload_file",
     
     # Moderation
     "moderate_content", "moderate_challenge", "moderate_post"
@@ -0,0 +1,110 @@
+"""
+In-process TTL cache for short-lived read results.
+
+Entries expire after a fixed time-to-live and the least recently used entry
+is evicted once the cache is full. Each worker process keeps its own copy,
+so TTLs should stay short enough that cross-worker staleness is acceptable.
+
+SingleFlight complements the cache: when many requests miss on the same key
+at once, only one of them loads it and the rest await that result.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        """
+        Args:
+            maxsize (int): Maximum number of entries kept before evicting
+            ttl (float): Seconds an entry stays valid after being set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for a key, or `default` if missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, *keys: Hashable) -> None:
+        """
+        Invalidate one or more keys. Missing keys are ignored.
+        """
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Drop every entry.
+        """
+        with self._lock:
+            self._data.clear()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async loads of the same key into a single call.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `load()` for a key, or join the call already in flight for it.
+
+        The load runs as its own task, so a caller that disconnects does not
+        cancel it for the others waiting on the same key. Exceptions are
+        raised to every waiter.
+
+        Args:
+            key (Hashable): Identity of the load, usually the cache key
+            load (Callable): Zero-argument coroutine function producing the value
+
+        Returns:
+            Any: The value returned by `load()`
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            task.exception()
@@ -1,9 +1,10 @@
 import os
 from typing import Optional
 
+import httpx
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
 from sentence_transformers import SentenceTransformer
 
 
@@ -25,6 +26,10 @@ class Settings(BaseSettings):
     # ─── Supabase ─────────────────────────────────────────────────────────────
     SUPABASE_URL: str | None = Field(os.getenv("SUPABASE_URL"), env="SUPABASE_URL")
     SUPABASE_KEY: str | None = Field(os.getenv("SUPABASE_KEY"), env="SUPABASE_KEY")
+    SUPABASE_TIMEOUT: float = Field(10.0, env="SUPABASE_TIMEOUT")
+    SUPABASE_MAX_CONNECTIONS: int = Field(64, env="SUPABASE_MAX_CONNECTIONS")
+    SUPABASE_MAX_KEEPALIVE: int = Field(32, env="SUPABASE_MAX_KEEPALIVE")
+    SUPABASE_KEEPALIVE_EXPIRY: float = Field(30.0, env="SUPABASE_KEEPALIVE_EXPIRY")
 
     # ─── OpenAI ─────────────────────────────────────────────────────────────
     OPENAI_KEY: str | None = Field(os.getenv("OPENAI_API_KEY"), env="OPENAI_API_KEY")
@@ -72,9 +77,29 @@ class Settings(BaseSettings):
 # instantiate
 settings = Settings()
 
+# Shared HTTP connection pool for the Supabase client. Keep-alive connections
+# are reused across requests (and across the threadpool workers that run
+# queries), so only the first call per connection pays the TCP/TLS handshake.
+# httpx drops idle connections after 5s by default; holding them longer keeps
+# traffic that arrives in bursts from reconnecting between bursts.
+supabase_http_client = httpx.Client(
+    http2=True,
+    timeout=settings.SUPABASE_TIMEOUT,
+    limits=httpx.Limits(
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    ),
+)
+
 # Initialize Supabase client
 supabase: Client = create_client(
     supabase_url=str(settings.SUPABASE_URL),
     supabase_key=str(settings.SUPABASE_KEY),
+    options=ClientOptions(
+        postgrest_client_timeout=settings.SUPABASE_TIMEOUT,
+        storage_client_timeout=int(settings.SUPABASE_TIMEOUT),
+        httpx_client=supabase_http_client,
+    ),
 )
 
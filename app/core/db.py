@@ -0,0 +1,51 @@
+"""
+Helpers for running Supabase queries from async endpoints.
+
+The supabase-py client used across the app is synchronous. Awaiting these
+helpers runs each query in Starlette's threadpool so the event loop keeps
+serving other requests, and lets independent queries run concurrently.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+from starlette.concurrency import run_in_threadpool
+
+
+def db_timestamp() -> str:
+    """
+    Current UTC time in the format written to timestamp columns.
+
+    The columns are timestamptz, so the explicit +00:00 offset keeps the
+    stored instant correct whatever timezone the server runs in.
+    isoformat() is implemented in C and is cheaper than strftime.
+
+    Returns:
+        str: Timestamp such as 2024-01-31T09:30:00.000000+00:00
+    """
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+async def execute(query):
+    """
+    Execute a PostgREST query without blocking the event loop.
+
+    Args:
+        query: A supabase-py request builder (table or rpc query)
+
+    Returns:
+        APIResponse: The query response
+    """
+    return await run_in_threadpool(query.execute)
+
+
+async def execute_all(*queries):
+    """
+    Execute several independent queries concurrently.
+
+    Args:
+        *queries: supabase-py request builders that do not depend on each other
+
+    Returns:
+        list[APIResponse]: Responses in the same order as the queries
+    """
+    return await asyncio.gather(*(execute(query) for query in queries))
@@ -1,3 +1,4 @@
+import hashlib
 import time
 import urllib.parse
 
@@ -8,16 +9,39 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt.exceptions import DecodeError
 from supabase import Client
 
+from app.core.cache import SingleFlight, TTLCache
 from app.core.config import settings, supabase
+from app.core.db import execute
 from app.schemas.users import UserOut
 
 # HTTP bearer scheme for auth
 bearer_scheme = HTTPBearer(auto_error=False)
 
+USER_COLUMNS = "id,username,email,full_name,avatar_url,bio,updated_at,fcm_token,timezone"
+# A client usually fires several requests at once (e.g. when a screen opens);
+# their profile lookups for the same user share one query
+user_loads = SingleFlight()
+# Profile rows of recently active users. Every authenticated request resolves
+# its user, so a client working through a screen reuses one row instead of
+# reading it again per request; profile writes drop the entry.
+user_cache = TTLCache(maxsize=10_000, ttl=30)
+
+# Decoded payloads of recently seen tokens, keyed by a digest of the token, so
+# a client's repeated requests skip the signature check. Expiry is still
+# checked on every hit.
+token_cache = TTLCache(maxsize=10_000, ttl=60)
+
+def invalidate_user(*user_ids: str):
+    """Drops cached profile rows for the given users."""
+    user_cache.pop(*user_ids)
+
 def get_supabase() -> Client:
     """
     Dependency that provides the Supabase client.
     
+    Always the process-wide client from app.core.config, so every request
+    shares its keep-alive connection pool; do not create a client here.
+    
     Returns:
         Client: Initialized Supabase client instance
     """
@@ -36,14 +60,18 @@ def verify_jwt_token(token: str) -> dict:
     Raises:
         HTTPException: If token is invalid or expired
     """
+    token_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
     try:
-        # Decode and verify the token
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
-            audience="authenticated"
-        )
+        payload = token_cache.get(token_key)
+        if payload is None:
+            # Decode and verify the token
+            payload = jwt.decode(
+                token,
+                settings.JWT_SECRET,
+                algorithms=[settings.JWT_ALGORITHM],
+                audience="authenticated"
+            )
+            token_cache.set(token_key, payload)
         
         # Check if token is expired
         if payload.get("exp") and payload.get("exp") < time.time():
@@ -61,7 +89,7 @@ def verify_jwt_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
     access_token: str | None = Cookie(None),
     supabase: Client = Depends(get_supabase),
@@ -110,12 +138,23 @@ def get_current_user(
     if not user_id:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User ID not found in token")
 
-    # Fetch user profile from database
-    resp = supabase.table("users")\
-        .select("id,username,email,full_name,avatar_url,bio,updated_at,fcm_token,timezone")\
-        .eq("id", user_id)\
-        .single().execute()
-    if not resp.data:
+    # Fetch user profile, going through the user cache
+    row = user_cache.get(user_id)
+    if row is None:
+        async def load() -> dict | None:
+            resp = await execute(
+                supabase.table("users")
+                .select(USER_COLUMNS)
+                .eq("id", user_id)
+                .limit(1)
+            )
+            if not resp.data:
+                return None
+            user_cache.set(user_id, resp.data[0])
+            return resp.data[0]
+
+        row = await user_loads.do(user_id, load)
+    if not row:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
 
-    return UserOut(**resp.data)
+    return UserOut.from_row(row)
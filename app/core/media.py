@@ -13,6 +13,7 @@ from datetime import datetime
 from typing import Literal, Optional
 
 from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import supabase
 
@@ -53,9 +54,11 @@ async def upload_base64_image(
         HTTPException: If upload fails
     """
     try:
-        # Strip data URI prefix if present
-        if "base64," in base64_data:
-            base64_data = base64_data.split("base64,")[1]
+        # Strip data URI prefix if present; partition finds it in a single
+        # scan of the (multi-megabyte) payload instead of a search then a split
+        _, prefix, payload = base64_data.partition("base64,")
+        if prefix:
+            base64_data = payload
         
         # Decode base64 to bytes
         image_bytes = base64.b64decode(base64_data)
@@ -69,8 +72,10 @@ async def upload_base64_image(
         if folder:
             path = f"{folder}/{path}"
             
-        # Upload to Supabase Storage
-        result = supabase.storage.from_(BUCKETS[bucket]).upload(
+        # Upload to Supabase Storage; the storage client is synchronous, so
+        # the request runs in the threadpool instead of blocking the event loop
+        result = await run_in_threadpool(
+            supabase.storage.from_(BUCKETS[bucket]).upload,
             path=path,
             file=image_bytes,
             file_options={"content-type": content_type}
@@ -133,8 +138,9 @@ async def upload_file(
         if folder:
             path = f"{folder}/{path}"
             
-        # Upload to Supabase Storage
-        result = supabase.storage.from_(BUCKETS[bucket]).upload(
+        # Upload to Supabase Storage (in the threadpool, as above)
+        result = await run_in_threadpool(
+            supabase.storage.from_(BUCKETS[bucket]).upload,
             path=path,
             file=contents,
             file_options=FileOptions(content_type=file.content_type)
@@ -156,6 +162,14 @@ async def upload_file(
             detail=f"Failed to upload file: {str(e)}"
         )
 
+def _storage_path(bucket: BucketType, file_path: str) -> str:
+    """Extracts the in-bucket path from a full public URL, if given one."""
+    if file_path.startswith("http"):
+        parts = file_path.split(f"{BUCKETS[bucket]}/")
+        if len(parts) > 1:
+            return parts[1]
+    return file_path
+
 def delete_file(bucket: BucketType, file_path: str) -> bool:
     """
     Delete a file from a Supabase Storage bucket.
@@ -171,11 +185,7 @@ def delete_file(bucket: BucketType, file_path: str) -> bool:
         HTTPException: If deletion fails
     """
     try:
-        # Extract the path from a full URL if needed
-        if file_path.startswith("http"):
-            parts = file_path.split(f"{BUCKETS[bucket]}/")
-            if len(parts) > 1:
-                file_path = parts[1]
+        file_path = _storage_path(bucket, file_path)
         
         # Delete the file
         supabase.storage.from_(BUCKETS[bucket]).remove([file_path])
@@ -188,6 +198,34 @@ def delete_file(bucket: BucketType, file_path: str) -> bool:
             detail=f"Failed to delete file: {str(e)}"
         )
 
+def delete_files(bucket: BucketType, file_paths: list[str]) -> bool:
+    """
+    Delete several files from a Supabase Storage bucket in one request.
+    
+    Args:
+        bucket: The bucket type
+        file_paths: Paths (or public URLs) of the files to delete
+        
+    Returns:
+        bool: True if deletion was successful
+        
+    Raises:
+        HTTPException: If deletion fails
+    """
+    if not file_paths:
+        return True
+    try:
+        paths = [_storage_path(bucket, file_path) for file_path in file_paths]
+        supabase.storage.from_(BUCKETS[bucket]).remove(paths)
+        logger.info(f"Successfully deleted {len(paths)} files from {bucket}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to delete files from {bucket}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete files: {str(e)}"
+        )
+
 def get_media_url(bucket: BucketType, path: str) -> str:
     """
     Get the public URL for a file in a storage bucket.
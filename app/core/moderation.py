@@ -1,13 +1,28 @@
+import hashlib
 import logging
 from enum import Enum
+from functools import lru_cache
 from typing import Dict, Tuple
 from fastapi import HTTPException, status
 from openai import OpenAI
+from starlette.concurrency import run_in_threadpool
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Verdicts keyed by the SHA-256 of the moderated text. Edits that resend the
+# text unchanged, and repeated submissions of the same text, reuse the
+# verdict instead of calling the Moderation API again.
+moderation_cache = TTLCache(maxsize=10_000, ttl=24 * 60 * 60)
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> OpenAI:
+    """Returns the process-wide OpenAI client, so its connection pool is reused across calls."""
+    return OpenAI(api_key=settings.OPENAI_KEY)
+
+
 class ModerationCategory(str, Enum):
     """Categories of content that may be flagged by the moderation API."""
     HARASSMENT = "harassment"
@@ -63,40 +78,41 @@ async def moderate_content(
             "category_scores": {}
         }
         
-    try:
-        client = OpenAI(api_key=settings.OPENAI_KEY)
-        response = client.moderations.create(
-            model="omni-moderation-latest",
-            input=content,
-        )
+    cache_key = hashlib.sha256(content.encode()).digest()
+    output_details = moderation_cache.get(cache_key)
         
-        # Get results from the first item (there's only one in our case)
-        results_data = response.results[0]
-        
-        # Check if content is flagged
-        is_flagged = results_data.flagged
-        
-        output_details = {
-            "flagged": is_flagged,
-            "flagged_categories": [],
-            "category_scores": vars(results_data.category_scores)
-        }
-        
-        if is_flagged:
-            flagged_categories_list = []
-            # Find categories that were flagged by iterating through the boolean category flags
-            for category_name, category_is_flagged in vars(results_data.categories).items():
-                if category_is_flagged:
-                    flagged_categories_list.append(category_name)
-            output_details["flagged_categories"] = flagged_categories_list
+    try:
+        if output_details is None:
+            response = await run_in_threadpool(
+                get_openai_client().moderations.create,
+                model="omni-moderation-latest",
+                input=content,
+            )
+            
+            # Get results from the first item (there's only one in our case)
+            results_data = response.results[0]
             
+            output_details = {
+                "flagged": results_data.flagged,
+                # Find categories that were flagged by iterating through the boolean category flags
+                "flagged_categories": [
+                    category_name
+                    for category_name, category_is_flagged in vars(results_data.categories).items()
+                    if category_is_flagged
+                ],
+                "category_scores": vars(results_data.category_scores)
+            }
+            # Only real verdicts are cached; API errors fall through below
+            moderation_cache.set(cache_key, output_details)
+        
+        if output_details["flagged"]:
             if raise_exception:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail={
                         "message": f"The {content_type} content was flagged as inappropriate and cannot be published.",
                         "reason": "Content moderation detected potentially harmful or inappropriate material.",
-                        "flagged_categories": flagged_categories_list
+                        "flagged_categories": output_details["flagged_categories"]
                     }
                 )
                 
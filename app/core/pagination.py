@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token encoding the (created_at, id) of the
+last row of a page. The next page is everything strictly older than that
+row, which Postgres can answer from a (created_at DESC, id DESC) index no
+matter how deep the client has paged.
+"""
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(row: dict) -> str:
+    """
+    Build the cursor pointing just after a row.
+
+    Args:
+        row (dict): Last row of the current page; needs created_at and id
+
+    Returns:
+        str: Opaque cursor token
+    """
+    raw = f"{row['created_at']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Decode a cursor back into its (created_at, id) pair.
+
+    Args:
+        cursor (str): Token previously returned by encode_cursor
+
+    The cursor comes from the client, so both parts are parsed and
+    re-serialised: only a real timestamp and UUID ever reach the filter.
+
+    Returns:
+        tuple[str, str]: Normalised created_at timestamp and row id
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(row_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def apply_cursor(query, cursor: str | None, limit: int):
+    """
+    Order a query newest-first and restrict it to the page after a cursor.
+
+    Args:
+        query: supabase-py select or rpc request builder
+        cursor (str, optional): Cursor of the previous page, None for the first page
+        limit (int): Page size
+
+    Returns:
+        The request builder with ordering, keyset filter and limit applied
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit)
+
+
+def next_cursor(rows: list[dict], limit: int) -> str | None:
+    """
+    Cursor for the page after `rows`, or None when this was the last page.
+    """
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1])
@@ -1,6 +1,7 @@
 import logging
 import time
 
+import anyio.to_thread
 import openai
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
@@ -9,7 +10,7 @@ from fastapi.openapi.utils import get_openapi
 from fastapi.responses import JSONResponse
 
 from app.api.v0 import api_router
-from app.core.config import settings
+from app.core.config import settings, supabase_http_client
 from app.core.middleware import apply_middlewares
 
 logging.basicConfig(
@@ -140,6 +141,12 @@ async def on_startup():
     """
     logger.info("🚀 Application starting up")
     
+    # Supabase queries run in the threadpool (see app/core/db.py). Size it to
+    # the HTTP pool so concurrent queries are not capped at anyio's default
+    # of 40 threads while pooled connections sit idle.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, settings.SUPABASE_MAX_CONNECTIONS)
+    
     # Initialize OpenAI with API key
     if settings.OPENAI_KEY:
         logger.info("Initializing OpenAI client")
@@ -154,6 +161,7 @@ async def on_shutdown():
     Cleans up resources and connections.
     """
     logger.info("🛑 Application shutting down")
+    supabase_http_client.close()
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -18,12 +18,12 @@ from app.schemas.likes import LikeCreate, LikeOut
 from app.schemas.notifications import (NotificationOut, NotificationStatus,
                                        NotificationType)
 from app.schemas.posts import PostCreate, PostOut, PostUpdate, SavedPostCreate
-from app.schemas.users import UserBase, UserOut, UserUpdate
+from app.schemas.users import UserBase, UserOut, UserUpdate, UserWithStats
 
 # Export the models for easy access
 __all__ = [
     "Token", "TokenData",
-    "UserBase", "UserOut", "UserUpdate",
+    "UserBase", "UserOut", "UserUpdate", "UserWithStats",
     "PostCreate", "PostOut", "PostUpdate", "SavedPostCreate",
     "CommentCreate", "CommentOut",
     "LikeCreate", "LikeOut",
@@ -3,7 +3,7 @@ from datetime import datetime, time
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
 
 from app.core.config import settings
 
@@ -88,6 +88,11 @@ class ChallengeBase(BaseModel):
                 return None
         return v
 
+    @field_serializer("check_in_time", when_used="json-unless-none")
+    def serialize_check_in_time(self, v: time) -> str:
+        # Stored and scheduled at whole-second precision
+        return v.strftime("%H:%M:%S")
+
 class ChallengeCreate(ChallengeBase):
     """
     Schema for creating a new challenge.
@@ -112,6 +117,11 @@ class ChallengeUpdate(BaseModel):
     is_private: Optional[bool] = Field(None)
     time_window: Optional[int] = Field(None)
     background_photo: Optional[List[str]] = Field(None, description="[bucket, filename] for the challenge background photo")
+
+    @field_serializer("check_in_time", when_used="json-unless-none")
+    def serialize_check_in_time(self, v: time) -> str:
+        # Stored and scheduled at whole-second precision
+        return v.strftime("%H:%M:%S")
     
 
 class ChallengeOut(ChallengeBase):
@@ -123,6 +133,8 @@ class ChallengeOut(ChallengeBase):
     creator_id: str
     created_at: str
     updated_at: str
+    participant_count: int = Field(0, description="Number of participants, maintained by trigger")
+    posts_count: int = Field(0, description="Number of check-in posts, maintained by trigger")
     scheduler_job_ids: Optional[dict] = None
     model_config = ConfigDict(from_attributes=True)
 
@@ -70,6 +70,8 @@ class PostOut(BaseModel):
     updated_at: datetime
     edited: bool
     challenge_id: Optional[str] = None
+    likes_count: int = Field(0, description="Number of likes on the post, maintained by trigger")
+    comments_count: int = Field(0, description="Number of comments on the post, maintained by trigger")
     is_endorsed: bool = False
     endorsement_info: Optional[PostEndorsementInfo] = None
     model_config = ConfigDict(from_attributes=True)
@@ -47,6 +47,32 @@ class UserOut(UserBase):
                 return None
         return v
 
+    @classmethod
+    def from_row(cls, row: dict) -> "UserOut":
+        """
+        Build a UserOut from a trusted users row without running validation.
+        Only updated_at needs coercion, so it is parsed here and every other
+        column is taken as stored.
+        
+        Args:
+            row (dict): Row from the users table
+            
+        Returns:
+            UserOut: User model built from the row
+        """
+        data = dict(row)
+        if "updated_at" in data:
+            data["updated_at"] = cls.parse_updated_at(data["updated_at"])
+        return cls.model_construct(**data)
+
+class UserWithStats(UserOut):
+    """
+    Schema for a user profile together with its activity counts.
+    """
+    posts_count: int = Field(0, description="Number of posts by the user")
+    followers_count: int = Field(0, description="Number of users following the user")
+    following_count: int = Field(0, description="Number of users the user follows")
+
 class UserUpdate(BaseModel):
     """
     Schema for updating user profile data.
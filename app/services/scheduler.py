@@ -1,5 +1,6 @@
 import logging
 import json
+from functools import lru_cache
 from typing import Dict, Optional
 
 from google.cloud import scheduler_v1
@@ -9,8 +10,9 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
 def get_scheduler_client() -> scheduler_v1.CloudSchedulerClient:
-    """Initializes and returns a Cloud Scheduler client."""
+    """Returns the process-wide Cloud Scheduler client, created on first use."""
     return scheduler_v1.CloudSchedulerClient()
 
 def create_scheduler_job(
@@ -0,0 +1,53 @@
+-- Denormalized participant and check-in post counts on challenges.
+-- Maintained by triggers so reads get the counts with the base row instead
+-- of running count(*) aggregates per challenge.
+ALTER TABLE public.challenges
+    ADD COLUMN IF NOT EXISTS participant_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS posts_count INTEGER NOT NULL DEFAULT 0;
+
+-- Participants
+CREATE OR REPLACE FUNCTION bump_challenge_participant_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE public.challenges SET participant_count = participant_count + 1
+        WHERE id = NEW.challenge_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE public.challenges SET participant_count = GREATEST(participant_count - 1, 0)
+        WHERE id = OLD.challenge_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_challenge_participant_count ON public.challenge_participants;
+CREATE TRIGGER tg_challenge_participant_count
+    AFTER INSERT OR DELETE ON public.challenge_participants
+    FOR EACH ROW EXECUTE FUNCTION bump_challenge_participant_count();
+
+-- Check-in posts (posts carrying a challenge_id)
+CREATE OR REPLACE FUNCTION bump_challenge_posts_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') AND OLD.challenge_id IS NOT NULL THEN
+        UPDATE public.challenges SET posts_count = GREATEST(posts_count - 1, 0)
+        WHERE id = OLD.challenge_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.challenge_id IS NOT NULL THEN
+        UPDATE public.challenges SET posts_count = posts_count + 1
+        WHERE id = NEW.challenge_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_challenge_posts_count ON public.posts;
+CREATE TRIGGER tg_challenge_posts_count
+    AFTER INSERT OR DELETE OR UPDATE OF challenge_id ON public.posts
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_challenge_posts_count();
+
+-- Backfill existing rows
+UPDATE public.challenges AS c
+SET participant_count = (SELECT count(*) FROM public.challenge_participants AS cp WHERE cp.challenge_id = c.id),
+    posts_count = (SELECT count(*) FROM public.posts AS p WHERE p.challenge_id = c.id);
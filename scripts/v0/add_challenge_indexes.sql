@@ -0,0 +1,13 @@
+-- Indexes for the challenge listing predicates.
+-- challenge_participants(challenge_id, user_id) is already covered by its
+-- primary key and (user_id) by idx_challenge_participants_user_id.
+-- CONCURRENTLY avoids locking writes; run each statement outside a transaction.
+
+-- A creator's challenges, newest first (creator_id = ? [AND is_private = ?] ORDER BY created_at DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenges_creator_private_created
+    ON public.challenges (creator_id, is_private, created_at DESC);
+
+-- Public challenges, newest first (NOT is_private ORDER BY created_at DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenges_public_created
+    ON public.challenges (created_at DESC)
+    WHERE NOT is_private;
@@ -0,0 +1,32 @@
+-- Notify endorsers from the database when endorsement requests are created.
+-- The API used to follow its post_endorsements insert with a second insert
+-- into notifications; the trigger writes them in the same statement.
+-- Statement-level with a transition table, so a batch of requests becomes
+-- one INSERT ... SELECT instead of one insert per row.
+CREATE OR REPLACE FUNCTION notify_endorsement_requests()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.notifications
+        (user_id, triggered_by_user_id, post_id, type, message, is_read, created_at, status)
+    SELECT
+        e.endorser_id,
+        p.user_id,
+        e.post_id,
+        'endorsement_request',
+        u.username || ' has requested your endorsement on their post',
+        false,
+        e.created_at,
+        'pending'
+    FROM new_endorsements AS e
+    JOIN public.posts AS p ON p.id = e.post_id
+    JOIN public.users AS u ON u.id = p.user_id
+    WHERE e.status = 'pending';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_notify_endorsement_requests ON public.post_endorsements;
+CREATE TRIGGER tg_notify_endorsement_requests
+    AFTER INSERT ON public.post_endorsements
+    REFERENCING NEW TABLE AS new_endorsements
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_endorsement_requests();
@@ -0,0 +1,19 @@
+-- Indexes backing keyset pagination ((created_at, id) < cursor ORDER BY created_at DESC, id DESC).
+-- CONCURRENTLY avoids locking writes; run each statement outside a transaction.
+
+-- Posts of one challenge, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_posts_challenge_created_id
+    ON public.posts (challenge_id, created_at DESC, id DESC)
+    WHERE challenge_id IS NOT NULL;
+
+-- Challenges, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenges_created_id
+    ON public.challenges (created_at DESC, id DESC);
+
+-- The post feed, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_posts_created_id
+    ON public.posts (created_at DESC, id DESC);
+
+-- One user's posts, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_posts_user_created_id
+    ON public.posts (user_id, created_at DESC, id DESC);
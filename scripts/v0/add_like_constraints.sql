@@ -0,0 +1,17 @@
+-- Make likes_unique actually reject duplicate likes.
+-- Every like has a NULL in either post_id or comment_id, and NULLs compare
+-- as distinct by default, so the original constraint never fired. With
+-- NULLS NOT DISTINCT (Postgres 15+) the insert itself is the duplicate check
+-- and can be written as INSERT ... ON CONFLICT DO NOTHING.
+
+-- Drop duplicates left behind by the broken constraint, keeping the oldest
+DELETE FROM public.likes AS l
+USING public.likes AS d
+WHERE l.user_id = d.user_id
+  AND l.post_id IS NOT DISTINCT FROM d.post_id
+  AND l.comment_id IS NOT DISTINCT FROM d.comment_id
+  AND (l.created_at, l.id) > (d.created_at, d.id);
+
+ALTER TABLE public.likes
+    DROP CONSTRAINT IF EXISTS likes_unique,
+    ADD CONSTRAINT likes_unique UNIQUE NULLS NOT DISTINCT (user_id, post_id, comment_id);
@@ -0,0 +1,60 @@
+-- Composite and partial indexes for hot per-user and per-post lookups that
+-- were only partly covered by single-column indexes.
+-- CONCURRENTLY avoids locking writes; run each statement outside a transaction.
+
+-- Who liked a post (likes_unique leads with user_id, so it cannot serve this)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_likes_post_id
+    ON public.likes (post_id);
+
+-- A user's notifications, newest first, one page at a time
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notifications_user_created
+    ON public.notifications (user_id, created_at DESC);
+
+-- Unread notifications for mark-all-read
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notifications_user_unread
+    ON public.notifications (user_id)
+    WHERE is_read = false;
+
+-- Pending endorsement requests addressed to a user
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_post_endorsements_endorser_pending
+    ON public.post_endorsements (endorser_id)
+    WHERE status = 'pending';
+
+-- Foreign keys that reference posts with ON DELETE CASCADE. delete_post relies
+-- on the cascade, and Postgres looks up the child rows by these columns; the
+-- existing keys on these tables lead with user_id and cannot serve that.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_saved_posts_post_id
+    ON public.user_saved_posts (post_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notifications_post_id
+    ON public.notifications (post_id)
+    WHERE post_id IS NOT NULL;
+
+-- Likes on a comment, and the cascade when a comment is deleted
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_likes_comment_id
+    ON public.likes (comment_id)
+    WHERE comment_id IS NOT NULL;
+
+-- A user's saved posts, most recently saved first, one page at a time
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_saved_posts_user_created
+    ON public.user_saved_posts (user_id, created_at DESC);
+
+-- The rest of a post's cascade: check-in links, and for each of its comments,
+-- replies and comment notifications
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenge_posts_post_id
+    ON public.challenge_posts (post_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_parent_comment_id
+    ON public.comments (parent_comment_id)
+    WHERE parent_comment_id IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_notifications_comment_id
+    ON public.notifications (comment_id)
+    WHERE comment_id IS NOT NULL;
+
+-- A post's comments in the order they were written. This supersedes the
+-- plain post_id index from create_tables.sql, which it covers as a prefix.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_post_created
+    ON public.comments (post_id, created_at);
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_comments_post_id;
@@ -0,0 +1,51 @@
+-- Denormalized like and comment counts on posts.
+-- Maintained by triggers so reads get the counts with the post row instead
+-- of running count(*) aggregates per post.
+ALTER TABLE public.posts
+    ADD COLUMN IF NOT EXISTS likes_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS comments_count INTEGER NOT NULL DEFAULT 0;
+
+-- Likes on the post itself (likes on its comments carry no post_id)
+CREATE OR REPLACE FUNCTION bump_post_likes_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.post_id IS NOT NULL THEN
+        UPDATE public.posts SET likes_count = likes_count + 1
+        WHERE id = NEW.post_id;
+    ELSIF TG_OP = 'DELETE' AND OLD.post_id IS NOT NULL THEN
+        UPDATE public.posts SET likes_count = GREATEST(likes_count - 1, 0)
+        WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_post_likes_count ON public.likes;
+CREATE TRIGGER tg_post_likes_count
+    AFTER INSERT OR DELETE ON public.likes
+    FOR EACH ROW EXECUTE FUNCTION bump_post_likes_count();
+
+-- Comments, replies included
+CREATE OR REPLACE FUNCTION bump_post_comments_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE public.posts SET comments_count = comments_count + 1
+        WHERE id = NEW.post_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE public.posts SET comments_count = GREATEST(comments_count - 1, 0)
+        WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_post_comments_count ON public.comments;
+CREATE TRIGGER tg_post_comments_count
+    AFTER INSERT OR DELETE ON public.comments
+    FOR EACH ROW EXECUTE FUNCTION bump_post_comments_count();
+
+-- Backfill existing rows
+UPDATE public.posts AS p
+SET likes_count = (SELECT count(*) FROM public.likes AS l WHERE l.post_id = p.id),
+    comments_count = (SELECT count(*) FROM public.comments AS c WHERE c.post_id = p.id);
@@ -0,0 +1,7 @@
+-- Full-text index backing search_users (make_search_rpc.sql).
+-- The indexed expression must match the one in the function exactly.
+-- CONCURRENTLY avoids locking writes; run outside a transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_search_fts
+    ON public.users
+    USING GIN (to_tsvector('simple', coalesce(username, '') || ' ' || coalesce(full_name, '')));
@@ -0,0 +1,28 @@
+-- Composite indexes for the time-windowed challenge scans.
+-- Column order follows the WHERE-then-range predicate so the planner can
+-- walk only the rows inside the window instead of every row per challenge.
+-- CONCURRENTLY avoids locking writes; run each statement outside a transaction.
+
+-- Recent joins per challenge (challenge_id = ? AND joined_at > ?)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenge_participants_challenge_joined
+    ON public.challenge_participants (challenge_id, joined_at DESC);
+
+-- Recent check-in posts per challenge (challenge_id = ? AND created_at > ?)
+-- Check-ins are stored as posts carrying a challenge_id.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_posts_challenge_created
+    ON public.posts (challenge_id, created_at DESC)
+    WHERE challenge_id IS NOT NULL;
+
+-- A user's achievements, newest first (user_id = ? ORDER BY achieved_at DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenge_achievements_user_achieved
+    ON public.challenge_achievements (user_id, achieved_at DESC);
+
+-- The challenge_trending refresh counts every row inside the 7 day window
+-- across all challenges (joined_at > ? GROUP BY challenge_id), so the window
+-- column has to lead. INCLUDE keeps both grouped counts index-only scans.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_challenge_participants_joined
+    ON public.challenge_participants (joined_at DESC) INCLUDE (challenge_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_posts_challenge_window
+    ON public.posts (created_at DESC) INCLUDE (challenge_id)
+    WHERE challenge_id IS NOT NULL;
@@ -0,0 +1,58 @@
+-- Denormalized post, follower and following counts on users.
+-- Maintained by triggers so profile reads get the counts with the user row
+-- instead of running count(*) aggregates per profile view.
+ALTER TABLE public.users
+    ADD COLUMN IF NOT EXISTS posts_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS followers_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS following_count INTEGER NOT NULL DEFAULT 0;
+
+-- Posts by the user
+CREATE OR REPLACE FUNCTION bump_user_posts_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE public.users SET posts_count = posts_count + 1
+        WHERE id = NEW.user_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE public.users SET posts_count = GREATEST(posts_count - 1, 0)
+        WHERE id = OLD.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_user_posts_count ON public.posts;
+CREATE TRIGGER tg_user_posts_count
+    AFTER INSERT OR DELETE ON public.posts
+    FOR EACH ROW EXECUTE FUNCTION bump_user_posts_count();
+
+-- Follows: one row moves the followed user's followers_count and the
+-- follower's following_count
+CREATE OR REPLACE FUNCTION bump_user_follow_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE public.users SET followers_count = followers_count + 1
+        WHERE id = NEW.followed_id;
+        UPDATE public.users SET following_count = following_count + 1
+        WHERE id = NEW.follower_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE public.users SET followers_count = GREATEST(followers_count - 1, 0)
+        WHERE id = OLD.followed_id;
+        UPDATE public.users SET following_count = GREATEST(following_count - 1, 0)
+        WHERE id = OLD.follower_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tg_user_follow_counts ON public.follows;
+CREATE TRIGGER tg_user_follow_counts
+    AFTER INSERT OR DELETE ON public.follows
+    FOR EACH ROW EXECUTE FUNCTION bump_user_follow_counts();
+
+-- Backfill existing rows
+UPDATE public.users AS u
+SET posts_count = (SELECT count(*) FROM public.posts AS p WHERE p.user_id = u.id),
+    followers_count = (SELECT count(*) FROM public.follows AS f WHERE f.followed_id = u.id),
+    following_count = (SELECT count(*) FROM public.follows AS f WHERE f.follower_id = u.id);
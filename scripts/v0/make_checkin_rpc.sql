@@ -0,0 +1,36 @@
+-- Record a challenge check-in in a single round trip.
+-- Bumps the participant's count, recomputes the streak from the gap between
+-- their two most recent check-in posts and refreshes the success rate.
+CREATE OR REPLACE FUNCTION record_challenge_checkin(p_user_id UUID, p_challenge_id UUID)
+RETURNS VOID AS $$
+    WITH recent AS (
+        SELECT p.created_at::date AS day
+        FROM public.posts AS p
+        WHERE p.user_id = p_user_id
+          AND p.challenge_id = p_challenge_id
+        ORDER BY p.created_at DESC
+        LIMIT 2
+    ), gap AS (
+        SELECT count(*) AS n, max(day) - min(day) AS days
+        FROM recent
+    )
+    UPDATE public.challenge_participants AS cp
+    SET
+        count = COALESCE(cp.count, 0) + 1,
+        streaks = CASE
+            WHEN gap.n < 2 THEN 1                      -- first check-in
+            WHEN gap.days = 1 THEN COALESCE(cp.streaks, 0) + 1
+            WHEN gap.days > 1 THEN 1                   -- streak broken
+            ELSE COALESCE(cp.streaks, 0)               -- same day, unchanged
+        END,
+        success_rate = (COALESCE(cp.count, 0) + 1)::float
+            / GREATEST(current_date - cp.joined_at::date + 1, 1)
+    FROM gap
+    WHERE cp.user_id = p_user_id
+      AND cp.challenge_id = p_challenge_id;
+$$ LANGUAGE sql;
+
+-- Serves the "latest check-ins of one user in one challenge" lookup above
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_posts_user_challenge_created
+    ON public.posts (user_id, challenge_id, created_at DESC)
+    WHERE challenge_id IS NOT NULL;
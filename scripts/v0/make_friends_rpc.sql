@@ -0,0 +1,13 @@
+-- Mutual follows ("friends") of a user, resolved in the database.
+-- The join probes follows_unique (follower_id, followed_id) once per account
+-- the user follows, so only the mutual ids leave Postgres instead of both
+-- full follow lists.
+CREATE OR REPLACE FUNCTION mutual_follows(p_user_id UUID)
+RETURNS TABLE(user_id UUID) AS $$
+    SELECT f.followed_id
+    FROM public.follows AS f
+    JOIN public.follows AS b
+      ON b.follower_id = f.followed_id
+     AND b.followed_id = f.follower_id
+    WHERE f.follower_id = p_user_id;
+$$ LANGUAGE sql STABLE;
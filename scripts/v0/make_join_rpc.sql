@@ -0,0 +1,21 @@
+-- Join a challenge in one round trip.
+-- The primary key on (challenge_id, user_id) makes the insert the uniqueness
+-- check, so concurrent joins cannot both succeed. Errors are raised with
+-- stable messages that the API maps to HTTP status codes.
+CREATE OR REPLACE FUNCTION join_challenge(p_challenge_id UUID, p_user_id UUID)
+RETURNS public.challenge_participants AS $$
+DECLARE
+    new_row public.challenge_participants;
+BEGIN
+    INSERT INTO public.challenge_participants (challenge_id, user_id)
+    VALUES (p_challenge_id, p_user_id)
+    RETURNING * INTO new_row;
+
+    RETURN new_row;
+EXCEPTION
+    WHEN unique_violation THEN
+        RAISE EXCEPTION 'already_joined';
+    WHEN foreign_key_violation THEN
+        RAISE EXCEPTION 'challenge_not_found';
+END;
+$$ LANGUAGE plpgsql;
@@ -1,7 +1,8 @@
+-- Ranked user search. The WHERE clause matches idx_users_search_fts
+-- (add_search_indexes.sql), so candidates come from the GIN index instead of
+-- building a tsvector for every user.
 CREATE OR REPLACE FUNCTION search_users(p_search_term TEXT)
 RETURNS TABLE(id UUID, username TEXT, full_name TEXT, avatar_url TEXT[], email TEXT) AS $$
-BEGIN
-    RETURN QUERY
     SELECT
         u.id,
         u.username::TEXT,
@@ -10,12 +11,10 @@ BEGIN
         u.email::TEXT
     FROM
         users AS u,
-        websearch_to_tsquery('simple', p_search_term) AS query,
-        to_tsvector('simple', u.username || ' ' || u.full_name) AS document
+        websearch_to_tsquery('simple', p_search_term) AS query
     WHERE
-        document @@ query
+        to_tsvector('simple', coalesce(u.username, '') || ' ' || coalesce(u.full_name, '')) @@ query
     ORDER BY
-        ts_rank(document, query) DESC
+        ts_rank(to_tsvector('simple', coalesce(u.username, '') || ' ' || coalesce(u.full_name, '')), query) DESC
     LIMIT 10;
-END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE sql STABLE;
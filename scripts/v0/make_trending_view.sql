@@ -0,0 +1,66 @@
+-- Pre-aggregated trending scores for challenges.
+-- Recent joins are weighted 3x against recent check-in posts over a 7 day window.
+-- Only challenges with activity in the window are kept, so the view (and each
+-- refresh) scales with recent activity rather than with every challenge ever made.
+-- Recreated rather than altered; dropping it also drops the computed
+-- relationship below, which is recreated with it.
+DROP MATERIALIZED VIEW IF EXISTS public.challenge_trending CASCADE;
+CREATE MATERIALIZED VIEW public.challenge_trending AS
+SELECT
+    c.id AS challenge_id,
+    COALESCE(p.cnt, 0) AS recent_participants,
+    COALESCE(x.cnt, 0) AS recent_posts,
+    COALESCE(p.cnt, 0) * 3 + COALESCE(x.cnt, 0) AS trend_score,
+    now() AS computed_at
+FROM public.challenges AS c
+LEFT JOIN (
+    SELECT challenge_id, count(*) AS cnt
+    FROM public.challenge_participants
+    WHERE joined_at > now() - interval '7 days'
+    GROUP BY challenge_id
+) AS p ON p.challenge_id = c.id
+LEFT JOIN (
+    SELECT challenge_id, count(*) AS cnt
+    FROM public.posts
+    WHERE challenge_id IS NOT NULL
+      AND created_at > now() - interval '7 days'
+    GROUP BY challenge_id
+) AS x ON x.challenge_id = c.id
+-- A NULL is_private counts as private, as in visible_challenges and rls.sql
+WHERE c.is_private IS FALSE
+  AND (p.cnt IS NOT NULL OR x.cnt IS NOT NULL);
+
+-- The unique index is required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX idx_challenge_trending_challenge_id
+    ON public.challenge_trending (challenge_id);
+-- Serves the endpoint's whole top-K read: ORDER BY trend_score DESC,
+-- challenge_id LIMIT k walks this index and stops after k entries
+CREATE INDEX idx_challenge_trending_score
+    ON public.challenge_trending (trend_score DESC, challenge_id);
+
+-- Computed relationship so PostgREST can embed challenges(*) from the view
+CREATE OR REPLACE FUNCTION public.challenges(public.challenge_trending)
+RETURNS SETOF public.challenges ROWS 1 AS $$
+    SELECT * FROM public.challenges WHERE id = $1.challenge_id
+$$ LANGUAGE sql STABLE;
+
+GRANT SELECT ON public.challenge_trending TO anon, authenticated;
+
+-- Refresh entry point for the schedule below, also callable by the service
+-- role (e.g. from tests) to refresh on demand
+CREATE OR REPLACE FUNCTION public.refresh_challenge_trending()
+RETURNS void AS $$
+    REFRESH MATERIALIZED VIEW CONCURRENTLY public.challenge_trending;
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.refresh_challenge_trending() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.refresh_challenge_trending() TO service_role;
+
+-- Refresh every 5 minutes (requires the pg_cron extension); scheduling an
+-- existing job name replaces it
+CREATE EXTENSION IF NOT EXISTS pg_cron;
+SELECT cron.schedule(
+    'refresh-challenge-trending',
+    '*/5 * * * *',
+    $$SELECT public.refresh_challenge_trending()$$
+);
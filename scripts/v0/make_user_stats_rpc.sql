@@ -0,0 +1,31 @@
+-- A user's public profile together with their post, follower and following
+-- counts, in one round trip. The counts are the trigger-maintained columns
+-- from add_user_counters.sql (apply that first), so a profile view is a
+-- single lookup on the username index with no aggregates.
+CREATE OR REPLACE FUNCTION get_user_with_stats(p_username TEXT)
+RETURNS TABLE(
+    id UUID,
+    username TEXT,
+    full_name TEXT,
+    avatar_url TEXT[],
+    email TEXT,
+    bio TEXT,
+    updated_at TIMESTAMPTZ,
+    posts_count BIGINT,
+    followers_count BIGINT,
+    following_count BIGINT
+) AS $$
+    SELECT
+        u.id,
+        u.username::TEXT,
+        u.full_name::TEXT,
+        u.avatar_url,
+        u.email::TEXT,
+        u.bio,
+        u.updated_at,
+        u.posts_count::BIGINT,
+        u.followers_count::BIGINT,
+        u.following_count::BIGINT
+    FROM public.users AS u
+    WHERE u.username = p_username;
+$$ LANGUAGE sql STABLE;
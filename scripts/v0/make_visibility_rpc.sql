@@ -0,0 +1,33 @@
+-- Challenges a user is allowed to see: public ones, ones they created and
+-- private ones they have joined. Evaluated entirely in Postgres so callers can
+-- page over the result with PostgREST's range/order.
+--
+-- Written as a UNION ALL of disjoint branches rather than one OR so each
+-- branch can use its own index (idx_challenges_public_created,
+-- idx_challenges_creator_private_created, idx_challenge_participants_user_id).
+-- As a single-statement SQL function it is inlined, so the caller's ORDER BY,
+-- LIMIT and keyset filter are pushed into every branch and the public branch
+-- stops after one page instead of scanning every public challenge.
+-- A NULL is_private counts as private, as in the original OR form.
+CREATE OR REPLACE FUNCTION visible_challenges(p_user_id UUID)
+RETURNS SETOF public.challenges AS $$
+    SELECT c.*
+    FROM public.challenges AS c
+    WHERE NOT c.is_private
+
+    UNION ALL
+
+    SELECT c.*
+    FROM public.challenges AS c
+    WHERE c.is_private IS NOT FALSE
+      AND c.creator_id = p_user_id
+
+    UNION ALL
+
+    SELECT c.*
+    FROM public.challenge_participants AS cp
+    JOIN public.challenges AS c ON c.id = cp.challenge_id
+    WHERE cp.user_id = p_user_id
+      AND c.is_private IS NOT FALSE
+      AND c.creator_id <> p_user_id
+$$ LANGUAGE sql STABLE;
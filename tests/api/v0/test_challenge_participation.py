@@ -124,4 +124,18 @@ def test_get_created_challenges(client, auth_headers, test_challenge_id):
     # Verify response data
     data = response.json()
     challenge_ids = [c["id"] for c in data]
-    assert test_challenge_id in challenge_ids 
\ No newline at end of file
+    assert test_challenge_id in challenge_ids
+
+
+def test_participant_count_tracks_joins(client, auth_headers, test_challenge_id):
+    """Test that the denormalized participant count follows join/leave"""
+    before = client.get(f"/api/v0/challenges/{test_challenge_id}").json()["participant_count"]
+    
+    client.post(f"/api/v0/challenges/{test_challenge_id}/join", headers=auth_headers)
+    after_join = client.get(f"/api/v0/challenges/{test_challenge_id}").json()["participant_count"]
+    
+    client.delete(f"/api/v0/challenges/{test_challenge_id}/leave", headers=auth_headers)
+    after_leave = client.get(f"/api/v0/challenges/{test_challenge_id}").json()["participant_count"]
+    
+    assert after_join == before + 1
+    assert after_leave == before
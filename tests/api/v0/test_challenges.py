@@ -5,7 +5,8 @@ import pytest
 
 from app.api.v0.challenges import (create_challenge, delete_challenge,
                                    get_challenge, list_challenges,
-                                   update_challenge)
+                                   trending_cache, update_challenge)
+from app.core.config import supabase
 from app.schemas.challenges import ChallengeCreate, ChallengeUpdate
 
 
@@ -46,4 +47,116 @@ def test_create_update_delete_challenge_integration(client, auth_headers):
     # Delete
     resp3 = client.delete(f"/api/v0/challenges/{cid}", headers=auth_headers)
     assert resp3.status_code == 204
-    assert client.get(f"/api/v0/challenges/{cid}").status_code == 404 
\ No newline at end of file
+    assert client.get(f"/api/v0/challenges/{cid}").status_code == 404
+
+def test_trending_challenges_integration(client):
+    resp = client.get("/api/v0/challenges/trending", params={"limit": 5})
+    assert resp.status_code == 200
+    
+    challenges = resp.json()
+    assert isinstance(challenges, list)
+    assert len(challenges) <= 5
+
+def test_trending_excludes_null_privacy_integration(client, auth_headers):
+    payload = {"title": "Null Privacy Chal", "description": "Desc", "frequency_days": 1}
+    cid = client.post("/api/v0/challenges/", json=payload, headers=auth_headers).json()["id"]
+    try:
+        resp = client.put(f"/api/v0/challenges/{cid}", json={"is_private": None}, headers=auth_headers)
+        assert resp.status_code == 200
+        # A recent join puts the challenge in the trending window
+        client.post(f"/api/v0/challenges/{cid}/join", headers=auth_headers)
+        supabase.rpc("refresh_challenge_trending").execute()
+        trending_cache.clear()
+        
+        row = supabase.table("challenge_trending").select("challenge_id").eq("challenge_id", cid).execute()
+        assert not row.data
+        resp = client.get("/api/v0/challenges/trending", params={"limit": 50})
+        assert resp.status_code == 200
+        assert cid not in {c["id"] for c in resp.json()}
+    finally:
+        client.delete(f"/api/v0/challenges/{cid}", headers=auth_headers)
+
+def test_trending_challenges_cacheable_integration(client):
+    resp = client.get("/api/v0/challenges/trending", params={"limit": 5})
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"].startswith("public")
+    
+    # A repeat request is served from the cache with the same body
+    assert client.get("/api/v0/challenges/trending", params={"limit": 5}).json() == resp.json()
+
+def test_challenge_participants_pagination_integration(client):
+    challenges = client.get("/api/v0/challenges/").json()
+    assert challenges
+    
+    cid = challenges[0]["id"]
+    resp = client.get(f"/api/v0/challenges/{cid}/participants", params={"limit": 1})
+    assert resp.status_code == 200
+    assert len(resp.json()) <= 1
+    
+    assert client.get(f"/api/v0/challenges/{cid}/participants", params={"limit": 500}).status_code == 422
+
+def test_get_challenge_reflects_update_integration(client, auth_headers):
+    payload = {"title": "Cache Chal", "description": "Before", "frequency_days": 1}
+    cid = client.post("/api/v0/challenges/", json=payload, headers=auth_headers).json()["id"]
+    
+    # Warm the cache, then make sure the update invalidates it
+    assert client.get(f"/api/v0/challenges/{cid}").json()["description"] == "Before"
+    client.put(f"/api/v0/challenges/{cid}", json={"description": "After"}, headers=auth_headers)
+    assert client.get(f"/api/v0/challenges/{cid}").json()["description"] == "After"
+    
+    client.delete(f"/api/v0/challenges/{cid}", headers=auth_headers)
+
+def test_list_visible_challenges_integration(client, auth_headers):
+    resp = client.get("/api/v0/challenges/visible", params={"limit": 3}, headers=auth_headers)
+    assert resp.status_code == 200
+    
+    challenges = resp.json()
+    assert isinstance(challenges, list)
+    assert len(challenges) <= 3
+    
+    assert client.get("/api/v0/challenges/visible").status_code == 401
+
+def test_missing_challenge_returns_404_integration(client):
+    missing = "00000000-0000-0000-0000-000000000000"
+    assert client.get(f"/api/v0/challenges/{missing}/participants").status_code == 404
+    assert client.get(f"/api/v0/challenges/{missing}/posts").status_code == 404
+
+def test_visible_challenges_cursor_pagination_integration(client, auth_headers):
+    first = client.get("/api/v0/challenges/visible", params={"limit": 1}, headers=auth_headers)
+    assert first.status_code == 200
+    
+    cursor = first.headers.get("X-Next-Cursor")
+    if cursor:
+        second = client.get("/api/v0/challenges/visible", params={"limit": 1, "cursor": cursor}, headers=auth_headers)
+        assert second.status_code == 200
+        assert second.json()[0]["id"] != first.json()[0]["id"]
+    
+    bad = client.get("/api/v0/challenges/visible", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert bad.status_code == 400
+
+def test_get_challenge_etag_integration(client):
+    challenges = client.get("/api/v0/challenges/").json()
+    assert challenges
+    
+    cid = challenges[0]["id"]
+    resp = client.get(f"/api/v0/challenges/{cid}")
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    
+    cached = client.get(f"/api/v0/challenges/{cid}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+def test_search_challenges_pagination_integration(client):
+    resp = client.get("/api/v0/challenges/search/challenges", params={"query": "run", "limit": 2})
+    assert resp.status_code == 200
+    assert len(resp.json()) <= 2
+    
+    assert client.get("/api/v0/challenges/search/challenges", params={"query": "run", "limit": 500}).status_code == 422
+
+def test_challenge_ranking_invalid_metric_integration(client):
+    challenges = client.get("/api/v0/challenges/").json()
+    assert challenges
+    
+    resp = client.get(f"/api/v0/challenges/{challenges[0]['id']}/ranking/likes")
+    assert resp.status_code == 400
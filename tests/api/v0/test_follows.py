@@ -12,3 +12,27 @@ def test_cannot_follow_self_integration(client, auth_headers):
     resp = client.post("/api/v0/follows/", json={"followee_id": me["id"]}, headers=auth_headers)
     assert resp.status_code == 400
 
+
+def test_followers_and_following_lists_integration(client, auth_headers):
+    me = client.get("/api/v0/users/me", headers=auth_headers).json()
+    for direction in ("followers", "following"):
+        resp = client.get(f"/api/v0/follows/by-user/{me['id']}/{direction}")
+        assert resp.status_code == 200
+        
+        users = resp.json()
+        assert isinstance(users, list)
+        assert all("username" in user for user in users)
+
+
+def test_follow_missing_user_integration(client, auth_headers):
+    resp = client.post(
+        "/api/v0/follows/",
+        json={"followed_id": "00000000-0000-0000-0000-000000000000"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 404
+
+
+def test_unfollow_missing_follow_integration(client, auth_headers):
+    resp = client.delete("/api/v0/follows/00000000-0000-0000-0000-000000000000", headers=auth_headers)
+    assert resp.status_code == 404
@@ -1,3 +1,4 @@
+import base64
 import types
 from types import SimpleNamespace
 
@@ -16,6 +17,23 @@ def test_list_posts_integration(client):
     assert isinstance(posts, list)
     assert len(posts) >= 4
 
+def test_list_posts_cursor_pagination_integration(client):
+    first = client.get("/api/v0/posts/", params={"limit": 2})
+    assert first.status_code == 200
+    assert len(first.json()) == 2
+    
+    cursor = first.headers.get("X-Next-Cursor")
+    assert cursor
+    second = client.get("/api/v0/posts/", params={"limit": 2, "cursor": cursor})
+    assert second.status_code == 200
+    assert not {p["id"] for p in first.json()} & {p["id"] for p in second.json()}
+
+def test_list_posts_tampered_cursor_integration(client):
+    for raw in ("2024-01-01T00:00:00+00:00|x),id.neq.null,and(id.eq.x", "yesterday|00000000-0000-0000-0000-000000000000"):
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+        resp = client.get("/api/v0/posts/", params={"cursor": cursor})
+        assert resp.status_code == 400
+
 def test_get_post_integration(client):
     posts = client.get("/api/v0/posts/").json()
     assert posts
@@ -50,4 +68,51 @@ def test_create_update_delete_post_integration(client, auth_headers):
     # Delete
     resp3 = client.delete(f"/api/v0/posts/{post_id}", headers=auth_headers)
     assert resp3.status_code == 204
-    assert client.get(f"/api/v0/posts/{post_id}").status_code == 404 
\ No newline at end of file
+    assert client.get(f"/api/v0/posts/{post_id}").status_code == 404
+
+def test_challenge_posts_count_tracks_posts_integration(client, auth_headers):
+    challenges = client.get("/api/v0/challenges/").json()
+    assert challenges
+    
+    challenge_id = challenges[0]["id"]
+    before = client.get(f"/api/v0/challenges/{challenge_id}").json()["posts_count"]
+    
+    payload = {"challenge_id": challenge_id, "content_url": "http://example.com/count.jpg"}
+    post_id = client.post("/api/v0/posts/", json=payload, headers=auth_headers).json()["id"]
+    assert client.get(f"/api/v0/challenges/{challenge_id}").json()["posts_count"] == before + 1
+    
+    client.delete(f"/api/v0/posts/{post_id}", headers=auth_headers)
+    assert client.get(f"/api/v0/challenges/{challenge_id}").json()["posts_count"] == before
+
+def test_save_unsave_post_integration(client, auth_headers):
+    posts = client.get("/api/v0/posts/").json()
+    assert posts
+    
+    post_id = posts[0]["id"]
+    assert client.post("/api/v0/saved-posts/", json={"post_id": post_id}, headers=auth_headers).status_code == 201
+    
+    resp = client.delete(f"/api/v0/saved-posts/{post_id}", headers=auth_headers)
+    assert resp.status_code == 204
+    assert resp.content == b""
+    assert client.delete(f"/api/v0/saved-posts/{post_id}", headers=auth_headers).status_code == 404
+
+def test_saved_posts_pagination_integration(client, auth_headers):
+    resp = client.get("/api/v0/saved-posts/", params={"limit": 1}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert len(resp.json()) <= 1
+    
+    assert client.get("/api/v0/saved-posts/", params={"limit": 500}, headers=auth_headers).status_code == 422
+
+def test_update_delete_missing_post_integration(client, auth_headers):
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    assert client.put(f"/api/v0/posts/{missing_id}", json={"content": "gone"}, headers=auth_headers).status_code == 404
+    assert client.put(f"/api/v0/posts/{missing_id}", json={"media_urls": []}, headers=auth_headers).status_code == 404
+    assert client.delete(f"/api/v0/posts/{missing_id}", headers=auth_headers).status_code == 404
+
+def test_update_others_post_forbidden_integration(client, auth_headers):
+    me = client.get("/api/v0/users/me", headers=auth_headers).json()
+    others = [p for p in client.get("/api/v0/posts/").json() if p["user_id"] != me["id"]]
+    assert others
+    
+    resp = client.put(f"/api/v0/posts/{others[0]['id']}", json={"content": "not mine"}, headers=auth_headers)
+    assert resp.status_code == 403
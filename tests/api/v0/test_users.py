@@ -22,3 +22,35 @@ def test_read_user_integration(client, auth_headers):
     resp = client.get(f"/api/v0/users/{user_id}")
     assert resp.status_code == 200
     assert resp.json()["email"] == me["email"]
+
+def test_read_me_after_update_integration(client, auth_headers):
+    client.get("/api/v0/users/me", headers=auth_headers)
+    client.put("/api/v0/users/me", json={"bio": "Cached profiles refresh on write"}, headers=auth_headers)
+    resp = client.get("/api/v0/users/me", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json()["bio"] == "Cached profiles refresh on write"
+
+def test_read_user_by_username_stats_integration(client, auth_headers):
+    me = client.get("/api/v0/users/me", headers=auth_headers).json()
+    resp = client.get(f"/api/v0/users/by-username/{me['username']}")
+    assert resp.status_code == 200
+    user = resp.json()
+    assert user["id"] == me["id"]
+    for key in ("posts_count", "followers_count", "following_count"):
+        assert user[key] >= 0
+
+def test_read_user_by_username_after_update_integration(client, auth_headers):
+    me = client.get("/api/v0/users/me", headers=auth_headers).json()
+    client.get(f"/api/v0/users/by-username/{me['username']}")
+    client.put("/api/v0/users/me", json={"bio": "Profile cache drops on write"}, headers=auth_headers)
+    resp = client.get(f"/api/v0/users/by-username/{me['username']}")
+    assert resp.status_code == 200
+    assert resp.json()["bio"] == "Profile cache drops on write"
+
+def test_read_me_repeated_token_integration(client, auth_headers):
+    first = client.get("/api/v0/users/me", headers=auth_headers)
+    second = client.get("/api/v0/users/me", headers=auth_headers)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["id"] == second.json()["id"]
+    bad = client.get("/api/v0/users/me", headers={"Authorization": "Bearer not-a-token"})
+    assert bad.status_code == 401